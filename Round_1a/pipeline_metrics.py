@@ -0,0 +1,143 @@
+"""
+Lightweight per-stage instrumentation shared by Round 1a and Round 1b.
+
+Stage timers (context manager or decorator), counters and peak-memory sampling collect into a
+process-wide `METRICS` registry that is written out as a JSON report. `profile_capture`
+wraps a block in cProfile and tracemalloc for one-off investigations of a single document.
+Only the standard library is used.
+"""
+import io
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+import functools
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of the current process in MB (0 where unsupported)."""
+    if resource is None:
+        return 0.0
+    scale = 1024 * 1024 if sys.platform == 'darwin' else 1024  # ru_maxrss is bytes on macOS, KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+class Metrics:
+    """A thread-safe registry of stage timings, counters and the peak RSS seen by each stage."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.stages = {}
+            self.counters = {}
+
+    @contextmanager
+    def timer(self, stage):
+        """Times the enclosed block as one call of `stage`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, peak_rss_mb())
+
+    def timed(self, stage=None):
+        """Decorator form of `timer`; the stage defaults to the function's qualified name."""
+        def decorator(fn):
+            name = stage or fn.__qualname__
+
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.timer(name):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, stage, seconds, rss_mb=0.0, calls=1, max_seconds=None):
+        with self._lock:
+            entry = self.stages.setdefault(stage, {"calls": 0, "seconds": 0.0, "max_seconds": 0.0, "peak_rss_mb": 0.0})
+            entry["calls"] += calls
+            entry["seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds if max_seconds is None else max_seconds)
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], rss_mb)
+
+    def count(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def report(self):
+        with self._lock:
+            return {
+                "started": datetime.utcfromtimestamp(self.started).isoformat() + "Z",
+                "wall_seconds": round(time.time() - self.started, 4),
+                "peak_rss_mb": round(peak_rss_mb(), 1),
+                "stages": {name: dict(entry, seconds=round(entry["seconds"], 6), max_seconds=round(entry["max_seconds"], 6))
+                           for name, entry in sorted(self.stages.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def drain(self):
+        """Returns the stages and counters collected so far and clears them (for worker processes)."""
+        with self._lock:
+            snapshot = {"stages": self.stages, "counters": self.counters}
+            self.stages, self.counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot):
+        """Adds a worker process's `drain()` snapshot to this registry."""
+        for stage, entry in snapshot["stages"].items():
+            self.record(stage, entry["seconds"], entry["peak_rss_mb"], calls=entry["calls"], max_seconds=entry["max_seconds"])
+        for name, value in snapshot["counters"].items():
+            self.count(name, value)
+
+    def write_report(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+        return path
+
+
+METRICS = Metrics()
+timer = METRICS.timer
+timed = METRICS.timed
+count = METRICS.count
+
+
+@contextmanager
+def profile_capture(output_prefix, top=40):
+    """
+    Profiles the enclosed block with cProfile and tracemalloc. Writes `<prefix>.prof` (for
+    pstats/snakeviz), `<prefix>_cpu.txt` (top functions by cumulative time) and
+    `<prefix>_memory.txt` (top allocation sites and the traced peak).
+    """
+    profiler = cProfile.Profile()
+    tracemalloc.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        profiler.dump_stats(output_prefix + ".prof")
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(top)
+        with open(output_prefix + "_cpu.txt", 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        with open(output_prefix + "_memory.txt", 'w', encoding='utf-8') as f:
+            f.write(f"traced peak: {peak / 2**20:.1f} MB, still allocated: {current / 2**20:.1f} MB\n\n")
+            for stat in snapshot.statistics("lineno")[:top]:
+                f.write(f"{stat}\n")
@@ -1,49 +1,126 @@
 import fitz  # PyMuPDF
+import functools
+import hashlib
+import inspect
 import json
 import os
 import re
-from collections import Counter
+import time
+import contextlib
+import multiprocessing
+import numpy as np
+from collections import Counter, deque, namedtuple
+import pipeline_metrics as metrics
 
-def get_text_styles(pdf_path):
-    styles = {}
-    font_counts = Counter()
+# Opt-in (--sample-styles): documents with more pages than this estimate the body font
+# size from a sample. Off by default, since a sample can pick a different body size.
+BODY_SIZE_SAMPLE_THRESHOLD = 200
+BODY_SIZE_SAMPLE_PAGES = 50
+# Early stopping: once this many spans are counted and the leading style holds
+# this share of them, further pages cannot realistically change the estimate
+BODY_SIZE_MIN_SPANS = 2000
+BODY_SIZE_DOMINANCE = 0.6
+
+# Parallel batch mode: documents are split into page-range shards of this size
+SHARD_PAGES = 50
+# Documents whose shards may be queued per worker process; finished layouts wait in
+# the parent until their document's turn, so this bounds parent memory
+DOCUMENTS_IN_FLIGHT_PER_WORKER = 2
+
+# Incremental mode: outlines are cached per PDF content hash and heuristic version.
+# The version is derived from the heuristic source, so editing is_heading_text,
+# extract_block_features or score_block_features invalidates the cache; bump this to
+# force it by hand.
+CACHE_SCHEMA = 1
+
+# Compact per-page layout shared by style detection and heading classification
+TextBlock = namedtuple('TextBlock', ['text', 'size', 'flags', 'bbox'])
+PageLayout = namedtuple('PageLayout', ['width', 'blocks', 'span_styles'])
+
+def extract_page_layout(page):
+    blocks = []
+    span_styles = []
+    for b in page.get_text("dict", flags=fitz.TEXTFLAGS_SEARCH)["blocks"]:
+        if "lines" not in b:
+            continue
+        for l in b["lines"]:
+            for s in l["spans"]:
+                span_styles.append((s['size'], s['flags']))
+        if b['type'] == 0:
+            text, size, font_flags = merge_spans(b)
+            if text:
+                blocks.append(TextBlock(text, size, font_flags, tuple(b['bbox'])))
+    return PageLayout(page.rect.width, blocks, span_styles)
+
+def extract_doc_layout(doc):
+    return [extract_page_layout(page) for page in doc]
+
+def extract_document_layout(pdf_path):
+    doc = fitz.open(pdf_path)
+    try:
+        return extract_doc_layout(doc)
+    finally:
+        doc.close()
 
+def extract_layout_shard(pdf_path, start_page, end_page):
     doc = fitz.open(pdf_path)
-    for page in doc:
-        blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_SEARCH)["blocks"]
-        for b in blocks:
-            if "lines" in b:
-                for l in b["lines"]:
-                    for s in l["spans"]:
-                        font_counts[(s['size'], s['flags'])] += 1
-    doc.close()
+    try:
+        return [extract_page_layout(doc[page_num]) for page_num in range(start_page, end_page)]
+    finally:
+        doc.close()
+
+def page_shards(page_count, shard_pages=SHARD_PAGES):
+    return [(start, min(start + shard_pages, page_count)) for start in range(0, page_count, shard_pages)]
+
+def _sample_page_numbers(page_count, sample_pages):
+    if not sample_pages or page_count <= sample_pages:
+        return list(range(page_count))
+    step = page_count / sample_pages
+    return sorted({int(i * step) for i in range(sample_pages)})
+
+def estimate_body_size(layout, sample_pages=None, early_stop=False):
+    font_counts = Counter()
+    for page_num in _sample_page_numbers(len(layout), sample_pages):
+        font_counts.update(layout[page_num].span_styles)
+        if early_stop:
+            total = sum(font_counts.values())
+            if total >= BODY_SIZE_MIN_SPANS and font_counts.most_common(1)[0][1] >= total * BODY_SIZE_DOMINANCE:
+                break
 
     if not font_counts:
         return {'body_size': 12.0}
 
     most_common_style = font_counts.most_common(1)[0][0]
-    styles['body_size'] = most_common_style[0]
-    return styles
+    return {'body_size': most_common_style[0]}
+
+def get_text_styles(pdf_path, layout=None, sample_above=None):
+    if layout is None:
+        layout = extract_document_layout(pdf_path)
+    if sample_above is not None and len(layout) > sample_above:
+        return estimate_body_size(layout, sample_pages=BODY_SIZE_SAMPLE_PAGES, early_stop=True)
+    return estimate_body_size(layout)
+
+NON_HEADING_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^version\s+\d+',
+    r'^\d{4}$',
+    r'^page\s+\d+',
+    r'^copyright',
+    r'^all rights reserved',
+    r'^international\s+software\s+testing',
+    r'^qualifications\s+board',
+    r'^\s*\d+\s*$',
+    r'^[^\w]*$',
+    r'^(the|and|or|but|in|on|at|to|for|of|with|by)$',
+)]
+NUMBERING_PATTERN = re.compile(r'^(\d+(?:\.\d+)*)\s+(.+)')
+HEADING_LEVELS = np.array(['H1', 'H2', 'H3'])
 
 def is_heading_text(text):
-    non_heading_patterns = [
-        r'^version\s+\d+',
-        r'^\d{4}$',
-        r'^page\s+\d+',
-        r'^copyright',
-        r'^all rights reserved',
-        r'^international\s+software\s+testing',
-        r'^qualifications\s+board',
-        r'^\s*\d+\s*$',
-        r'^[^\w]*$',
-        r'^(the|and|or|but|in|on|at|to|for|of|with|by)$',
-    ]
-
-    for pattern in non_heading_patterns:
-        if re.match(pattern, text.strip(), re.IGNORECASE):
+    clean_text = text.strip()
+    for pattern in NON_HEADING_PATTERNS:
+        if pattern.match(clean_text):
             return False
 
-    clean_text = text.strip()
     return 3 <= len(clean_text) <= 200
 
 def merge_spans(block):
@@ -55,93 +132,122 @@ def merge_spans(block):
         return "", None, None
     return full_text, all_spans[0]['size'], all_spans[0]['flags']
 
+def extract_block_features(layout, doc_styles):
+    """Collects the heading features of every candidate block in a document into NumPy arrays."""
+    texts, pages = [], []
+    sizes, bold, caps, depth, x0, x1, page_widths = [], [], [], [], [], [], []
+    for page_num, page in enumerate(layout):
+        for block in page.blocks:
+            text = block.text
+            if not text or not is_heading_text(text):
+                continue
+            number_match = NUMBERING_PATTERN.match(text)
+            texts.append(text)
+            pages.append(page_num + 1)
+            sizes.append(block.size)
+            bold.append((block.flags & 2**4) > 0)
+            caps.append(text.isupper() and 5 <= len(text) <= 50)
+            depth.append(number_match.group(1).count('.') if number_match else -1)
+            x0.append(block.bbox[0])
+            x1.append(block.bbox[2])
+            page_widths.append(page.width)
+
+    x0 = np.array(x0, dtype=np.float64)
+    x1 = np.array(x1, dtype=np.float64)
+    page_widths = np.array(page_widths, dtype=np.float64)
+    center_pos = x0 + (x1 - x0) / 2
+    features = {
+        'size_ratio': np.array(sizes, dtype=np.float64) / doc_styles['body_size'],
+        'bold': np.array(bold, dtype=bool),
+        'caps': np.array(caps, dtype=bool),
+        'numbering_depth': np.array(depth, dtype=np.int64),
+        'centered': np.abs(center_pos - page_widths / 2) < (page_widths * 0.15),
+        'left_margin': x0 < 100,
+    }
+    return texts, pages, features
+
+def score_block_features(features):
+    """Scores every block in one pass; returns (scores, level indices), level -1 meaning rejected."""
+    size_ratio = features['size_ratio']
+    numbered = features['numbering_depth'] >= 0
+
+    score = np.select([size_ratio >= 1.3, size_ratio >= 1.2, size_ratio >= 1.05], [30, 20, 10], 0)
+    score = score + 15 * features['bold'] + 10 * features['caps']
+    score = np.where(numbered,
+                     score + 25,
+                     score + 15 * features['centered'] + 5 * features['left_margin'])
+
+    # Numbered headings take their level from the numbering depth, the rest from the score
+    level = np.where(numbered,
+                     np.minimum(features['numbering_depth'], 2),
+                     np.select([score >= 35, score >= 25, score >= 15], [0, 1, 2], -1))
+    level = np.where(size_ratio < 1.05, -1, level)
+    return score, level
+
+def _write_trace(trace, document, texts, pages, features, scores, levels):
+    for i, text in enumerate(texts):
+        if features['size_ratio'][i] < 1.05:
+            reason = "size_ratio"
+        elif levels[i] < 0:
+            reason = "score"
+        else:
+            reason = None
+        trace.write(json.dumps({
+            "document": document,
+            "page": pages[i],
+            "text": text,
+            "size_ratio": round(float(features['size_ratio'][i]), 4),
+            "bold": bool(features['bold'][i]),
+            "caps": bool(features['caps'][i]),
+            "numbering_depth": int(features['numbering_depth'][i]),
+            "centered": bool(features['centered'][i]),
+            "left_margin": bool(features['left_margin'][i]),
+            "score": int(scores[i]),
+            "level": str(HEADING_LEVELS[levels[i]]) if levels[i] >= 0 else None,
+            "rejected": reason,
+        }, ensure_ascii=False) + "\n")
+
+def classify_layout(layout, doc_styles, trace=None, document=None):
+    texts, pages, features = extract_block_features(layout, doc_styles)
+    scores, levels = score_block_features(features)
+    if trace is not None:
+        _write_trace(trace, document, texts, pages, features, scores, levels)
+
+    return [{'level': str(HEADING_LEVELS[levels[i]]), 'text': texts[i], 'score': int(scores[i]), 'page': pages[i]}
+            for i in np.flatnonzero(levels >= 0)]
+
 def classify_heading(block, doc_styles, page_width):
+    """Scores one `page.get_text("dict")` block; returns {'level', 'text', 'score'} or None."""
     text, size, font_flags = merge_spans(block)
-    if not text or not is_heading_text(text):
+    if not text:
         return None
-
-    is_bold = (font_flags & 2**4) > 0
-    size_ratio = size / doc_styles['body_size']
-    
-    # Print initial info for every text block
-    print(f"\n--- Analyzing Text ---")
-    print(f"Text: '{text}'")
-    print(f"Font flags: {font_flags} | Is Bold: {is_bold} | Size ratio: {size_ratio:.2f}")
-    
-    # Loosened threshold
-    if size_ratio < 1.05:
-        print(f"REJECTED: Size ratio too small ({size_ratio:.2f} < 1.05)")
+    text_block = TextBlock(text, size, font_flags, tuple(block['bbox']))
+    candidates = classify_layout([PageLayout(page_width, [text_block], [])], doc_styles)
+    if not candidates:
         return None
+    result = candidates[0]
+    del result['page']
+    return result
 
-    score = 0
-
-     # Font size
-    if size_ratio >= 1.3:
-        score += 30
-        print(f"Font size bonus: +30 (ratio: {size_ratio:.2f})")
-    elif size_ratio >= 1.2:
-        score += 20
-        print(f"Font size bonus: +20 (ratio: {size_ratio:.2f})")
-    elif size_ratio >= 1.05:
-        score += 10
-        print(f"Font size bonus: +10 (ratio: {size_ratio:.2f})")
-
-    if is_bold:
-        score += 15
-        print(f"Bold bonus: +15")
-
-    if text.isupper() and 5 <= len(text) <= 50:
-        score += 10
-        print(f"All caps bonus: +10")
-
-    number_match = re.match(r'^(\d+(?:\.\d+)*)\s+(.+)', text)
-    if number_match:
-        score += 25
-        print(f"Numbering bonus: +25")
-        dot_count = number_match.group(1).count('.')
-        level = 'H1' if dot_count == 0 else 'H2' if dot_count == 1 else 'H3'
-        print(f"FINAL SCORE: {score} | LEVEL: {level}")
-        return {'level': level, 'text': text, 'score': score}
-
-    # Centered
-    block_width = block['bbox'][2] - block['bbox'][0]
-    center_pos = block['bbox'][0] + block_width / 2
-    page_center = page_width / 2
-
-    if abs(center_pos - page_center) < (page_width * 0.15):
-        score += 15
-        print(f"Centered bonus: +15")
-
-    if block['bbox'][0] < 100:
-        score += 5
-        print(f"Left margin bonus: +5")
-    print(f"FINAL SCORE: {score}")
-    if score >= 35:
-        level = 'H1'
-    elif score >= 25:
-        level = 'H2'
-    elif score >= 15:
-        level = 'H3'
-    else:
-        print(f"REJECTED: Score too low ({score} < 15)")
-        return None
-    print(f"ASSIGNED LEVEL: {level}")
-    return {'level': level, 'text': text, 'score': score}
+def extract_outline(pdf_path, layout=None, timings=None, trace=None, sample_above=None):
+    start_time = time.time()
+    if layout is None:
+        with metrics.timer("round1a.layout"):
+            layout = extract_document_layout(pdf_path)
+    with metrics.timer("round1a.text_styles"):
+        doc_styles = get_text_styles(pdf_path, layout=layout, sample_above=sample_above)
+    layout_time = time.time()
 
-def extract_outline(pdf_path):
-    doc = fitz.open(pdf_path)
-    doc_styles = get_text_styles(pdf_path)
-    all_candidates = []
-
-    for page_num, page in enumerate(doc):
-        blocks = page.get_text("dict", flags=fitz.TEXTFLAGS_SEARCH)["blocks"]
-        for block in blocks:
-            if block['type'] == 0 and "lines" in block:
-                result = classify_heading(block, doc_styles, page.rect.width)
-                if result:
-                    result['page'] = page_num + 1
-                    all_candidates.append(result)
-    doc.close()
+    with metrics.timer("round1a.classify"):
+        all_candidates = classify_layout(layout, doc_styles, trace=trace, document=os.path.basename(pdf_path))
+    metrics.count("round1a.documents")
+    metrics.count("round1a.pages", len(layout))
+    metrics.count("round1a.blocks", sum(len(page.blocks) for page in layout))
+    metrics.count("round1a.candidates", len(all_candidates))
+
+    if timings is not None:
+        timings['layout'] = layout_time - start_time
+        timings['classify'] = time.time() - layout_time
 
     title = ""
     title_candidates = [c for c in all_candidates if c['page'] <= 2]
@@ -160,33 +266,236 @@ def extract_outline(pdf_path):
             })
 
     outline.sort(key=lambda x: x['page'])
+    metrics.count("round1a.headings", len(outline))
 
     return {
         "title": title,
         "outline": outline
     }
 
-def process_all_pdfs_in_directory(input_dir, output_dir):
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+def write_outline(outline_data, output_dir, filename):
+    output_filename = os.path.splitext(filename)[0] + ".json"
+    output_path = os.path.join(output_dir, output_filename)
+
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(outline_data, f, indent=4, ensure_ascii=False)
+    return output_path
+
+def file_content_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+@functools.lru_cache(maxsize=None)
+def heuristic_version(sample_above=None):
+    # The hashed source cannot change while the process runs, so compute it once
+    digest = hashlib.sha256(str(CACHE_SCHEMA).encode())
+    for fn in (extract_page_layout, estimate_body_size, get_text_styles, is_heading_text,
+               merge_spans, extract_block_features, score_block_features, classify_layout, extract_outline):
+        digest.update(inspect.getsource(fn).encode())
+    constants = (sample_above, BODY_SIZE_SAMPLE_PAGES, BODY_SIZE_MIN_SPANS, BODY_SIZE_DOMINANCE,
+                 [p.pattern for p in NON_HEADING_PATTERNS], NUMBERING_PATTERN.pattern)
+    digest.update(repr(constants).encode())
+    return digest.hexdigest()[:16]
+
+def _cache_path(cache_dir, version, content_hash):
+    return os.path.join(cache_dir, version, content_hash + ".json")
+
+def load_cached_outline(cache_path):
+    if not os.path.exists(cache_path):
+        return None
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def store_cached_outline(cache_path, outline_data):
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(outline_data, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+
+def _save_outline(outline_data, output_dir, filename, cache_paths):
+    output_path = write_outline(outline_data, output_dir, filename)
+    if cache_paths and filename in cache_paths:
+        store_cached_outline(cache_paths[filename], outline_data)
+    return output_path
+
+def _process_pdfs_serial(pdf_files, input_dir, output_dir, cache_paths=None, trace=None, sample_above=None):
+    for filename in pdf_files:
+        pdf_path = os.path.join(input_dir, filename)
+        print(f"Processing {pdf_path}...")
+        try:
+            timings = {}
+            outline_data = extract_outline(pdf_path, timings=timings, trace=trace, sample_above=sample_above)
+            output_path = _save_outline(outline_data, output_dir, filename, cache_paths)
+            print(f"Successfully created {output_path} "
+                  f"(layout: {timings['layout']:.2f}s, classify: {timings['classify']:.2f}s)")
+        except Exception as e:
+            print(f"Could not process {pdf_path}. Error: {e}")
 
-    for filename in os.listdir(input_dir):
-        if filename.lower().endswith(".pdf"):
+def _submit_shards(pool, pdf_path, shards):
+    return [pool.apply_async(extract_layout_shard, (pdf_path, start, end)) for start, end in shards]
+
+def _process_pdfs_parallel(pdf_files, input_dir, output_dir, workers, shard_pages, timeout,
+                           cache_paths=None, trace=None, sample_above=None):
+    # Only a few documents are queued at a time, so finished layouts waiting to be
+    # classified do not pile up in this process
+    max_in_flight = workers * DOCUMENTS_IN_FLIGHT_PER_WORKER
+    files = iter(pdf_files)
+    in_flight = deque()
+    pool = multiprocessing.Pool(workers)
+
+    def top_up():
+        while len(in_flight) < max_in_flight:
+            filename = next(files, None)
+            if filename is None:
+                return
             pdf_path = os.path.join(input_dir, filename)
-            print(f"Processing {pdf_path}...")
             try:
-                outline_data = extract_outline(pdf_path)
-                output_filename = os.path.splitext(filename)[0] + ".json"
-                output_path = os.path.join(output_dir, output_filename)
+                with fitz.open(pdf_path) as doc:
+                    page_count = len(doc)
+            except Exception as e:
+                print(f"Could not process {pdf_path}. Error: {e}")
+                continue
+            shards = page_shards(page_count, shard_pages)
+            in_flight.append((filename, pdf_path, shards, _submit_shards(pool, pdf_path, shards)))
 
-                with open(output_path, 'w', encoding='utf-8') as f:
-                    json.dump(outline_data, f, indent=4, ensure_ascii=False)
+    try:
+        top_up()
+        while in_flight:
+            filename, pdf_path, shards, results = in_flight.popleft()
+            top_up()
+            print(f"Processing {pdf_path} ({len(shards)} shards)...")
+            start_time = time.time()
+            try:
+                layout = []
+                with metrics.timer("round1a.layout_wait"):
+                    for result in results:
+                        remaining = None if timeout is None else max(0.0, timeout - (time.time() - start_time))
+                        layout.extend(result.get(timeout=remaining))
+                wait_time = time.time() - start_time
 
-                print(f"Successfully created {output_path}")
+                timings = {}
+                outline_data = extract_outline(pdf_path, layout=layout, timings=timings, trace=trace,
+                                               sample_above=sample_above)
+                output_path = _save_outline(outline_data, output_dir, filename, cache_paths)
+                print(f"Successfully created {output_path} "
+                      f"(layout: {wait_time + timings['layout']:.2f}s, classify: {timings['classify']:.2f}s)")
+            except multiprocessing.TimeoutError:
+                # A running shard cannot be cancelled: kill the workers and requeue
+                # the other documents' shards on a fresh pool
+                print(f"Could not process {pdf_path}. Error: timed out after {timeout}s")
+                pool.terminate()
+                pool.join()
+                pool = multiprocessing.Pool(workers)
+                requeued = [(name, path, shards, _submit_shards(pool, path, shards))
+                            for name, path, shards, _ in in_flight]
+                in_flight.clear()
+                in_flight.extend(requeued)
             except Exception as e:
                 print(f"Could not process {pdf_path}. Error: {e}")
+    finally:
+        # Every result has been collected (or abandoned) by now
+        pool.terminate()
+        pool.join()
+
+def _split_cached(pdf_files, input_dir, output_dir, cache_dir, version):
+    cache_paths = {}
+    misses = []
+    for filename in pdf_files:
+        pdf_path = os.path.join(input_dir, filename)
+        try:
+            content_hash = file_content_hash(pdf_path)
+        except OSError as e:
+            print(f"Could not hash {pdf_path}. Error: {e}")
+            misses.append(filename)
+            continue
+        cache_path = _cache_path(cache_dir, version, content_hash)
+        outline_data = load_cached_outline(cache_path)
+        if outline_data is None:
+            cache_paths[filename] = cache_path
+            misses.append(filename)
+        else:
+            output_path = write_outline(outline_data, output_dir, filename)
+            metrics.count("round1a.cache_hits")
+            print(f"Reused cached outline for {pdf_path} -> {output_path}")
+    return misses, cache_paths
+
+def process_all_pdfs_in_directory(input_dir, output_dir, workers=1, shard_pages=SHARD_PAGES, timeout=None,
+                                  cache_dir=None, trace_path=None, metrics_path=None, profile_document=None,
+                                  sample_above=None):
+    # None or 0 uses every core, as `--workers 0` does
+    workers = workers or os.cpu_count() or 1
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith(".pdf")]
+    profiling = contextlib.nullcontext()
+    if profile_document:
+        # Profile one document in-process, bypassing the cache and the worker pool
+        pdf_files = [os.path.basename(profile_document)]
+        workers, cache_dir = 1, None
+        profile_prefix = os.path.join(output_dir, "profile_" + os.path.splitext(pdf_files[0])[0])
+        profiling = metrics.profile_capture(profile_prefix)
+    cache_paths = {}
+    if cache_dir:
+        version = heuristic_version(sample_above)
+        to_process, cache_paths = _split_cached(pdf_files, input_dir, output_dir, cache_dir, version)
+        hits = len(pdf_files) - len(to_process)
+        print(f"Outline cache ({version}): {hits} hits, {len(to_process)} misses")
+    else:
+        to_process = pdf_files
+
+    trace = open(trace_path, 'w', encoding='utf-8') if trace_path else None
+    try:
+        with profiling:
+            if workers <= 1:
+                _process_pdfs_serial(to_process, input_dir, output_dir, cache_paths, trace, sample_above)
+            else:
+                _process_pdfs_parallel(to_process, input_dir, output_dir, workers, shard_pages, timeout,
+                                       cache_paths, trace, sample_above)
+    finally:
+        if trace is not None:
+            trace.close()
+    if profile_document:
+        print(f"Profile written to {profile_prefix}.prof, {profile_prefix}_cpu.txt and {profile_prefix}_memory.txt")
+    if metrics_path:
+        print(f"Metrics written to {metrics.METRICS.write_report(metrics_path)}")
 
 if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Extract heading outlines from every PDF in a directory.")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Worker processes; 0 uses every core, 1 runs serially (default).")
+    parser.add_argument("--shard-pages", type=int, default=SHARD_PAGES,
+                        help="Pages per shard in parallel mode.")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="Seconds to wait for each document in parallel mode.")
+    parser.add_argument("--cache-dir", default=None,
+                        help="Reuse outlines of unchanged PDFs from this directory.")
+    parser.add_argument("--trace", default=None,
+                        help="Write a JSON-lines explanation of every scored block to this file.")
+    parser.add_argument("--sample-styles", type=int, nargs="?", const=BODY_SIZE_SAMPLE_THRESHOLD, default=None,
+                        metavar="PAGES",
+                        help="Estimate the body font size from a sample of pages for documents longer than "
+                             f"PAGES (default {BODY_SIZE_SAMPLE_THRESHOLD}). Off unless given.")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Write per-stage timings and counters to metrics.json in the output directory.")
+    parser.add_argument("--profile", default=None, metavar="PDF",
+                        help="Process only this input PDF under cProfile and tracemalloc.")
+    args = parser.parse_args()
+
     INPUT_DIRECTORY = "./input"
     OUTPUT_DIRECTORY = "./round1b/output_round1a"
-    process_all_pdfs_in_directory(INPUT_DIRECTORY, OUTPUT_DIRECTORY)
+    process_all_pdfs_in_directory(INPUT_DIRECTORY, OUTPUT_DIRECTORY,
+                                  workers=args.workers or os.cpu_count(),
+                                  shard_pages=args.shard_pages, timeout=args.timeout,
+                                  cache_dir=args.cache_dir, trace_path=args.trace,
+                                  metrics_path=os.path.join(OUTPUT_DIRECTORY, "metrics.json") if args.metrics else None,
+                                  profile_document=args.profile, sample_above=args.sample_styles)
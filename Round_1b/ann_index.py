@@ -0,0 +1,192 @@
+import os
+import json
+import numpy as np
+
+INDEX_ARRAYS = "ann_index.npz"
+INDEX_META = "ann_index.json"
+ASSIGN_BLOCK = 8192
+TRAIN_POINTS_PER_CENTROID = 64
+
+
+def _normalize(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    return x / np.maximum(norms, 1e-12)
+
+
+def _assign(x, centroids, spherical):
+    """Nearest centroid per row, computed in blocks to bound memory."""
+    bias = None if spherical else 0.5 * np.einsum('ij,ij->i', centroids, centroids)
+    labels = np.empty(len(x), dtype=np.int64)
+    for start in range(0, len(x), ASSIGN_BLOCK):
+        scores = x[start:start + ASSIGN_BLOCK] @ centroids.T
+        if bias is not None:
+            scores -= bias
+        labels[start:start + ASSIGN_BLOCK] = np.argmax(scores, axis=1)
+    return labels
+
+
+def kmeans(x, k, n_iter=20, seed=0, spherical=True):
+    """
+    Lloyd's k-means in NumPy. With `spherical=True` centroids are re-normalized every
+    iteration, i.e. clustering by cosine similarity on unit vectors.
+    """
+    rng = np.random.default_rng(seed)
+    # A sample of a few dozen points per centroid trains as well as the full set
+    if len(x) > k * TRAIN_POINTS_PER_CENTROID:
+        x = x[rng.choice(len(x), k * TRAIN_POINTS_PER_CENTROID, replace=False)]
+    k = min(k, len(x))
+    centroids = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(n_iter):
+        labels = _assign(x, centroids, spherical)
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=k)
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        non_empty = counts > 0
+        sums = np.add.reduceat(x[order], starts[non_empty], axis=0)
+        centroids[non_empty] = sums / counts[non_empty, None]
+        # Re-seed empty clusters with random points so every list stays usable
+        empty = np.flatnonzero(~non_empty)
+        if len(empty):
+            centroids[empty] = x[rng.choice(len(x), len(empty), replace=False)]
+        if spherical:
+            centroids = _normalize(centroids)
+    return centroids.astype(np.float32)
+
+
+class IVFIndex:
+    """
+    An inverted-file (IVF) approximate nearest-neighbour index for cosine similarity.
+
+    Vectors are normalized and partitioned by a k-means coarse quantizer; a query only scans
+    the `n_probe` lists whose centroids are closest to it. With `pq_subvectors > 0` the vectors
+    are stored as product-quantization codes (one byte per subvector) and scored with
+    asymmetric distance tables; `search(..., rerank_vectors=...)` re-scores the best PQ hits
+    exactly.
+    """
+    def __init__(self, n_lists=None, n_probe=8, pq_subvectors=0, n_iter=20, seed=0):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.pq_subvectors = pq_subvectors
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = None
+        self.list_offsets = None
+        self.ids = None
+        self.vectors = None
+        self.codes = None
+        self.codebooks = None
+        self.metadata = {}
+
+    def __len__(self):
+        return 0 if self.ids is None else len(self.ids)
+
+    def build(self, embeddings):
+        x = _normalize(embeddings)
+        n_lists = self.n_lists or max(1, int(np.sqrt(len(x))))
+        self.centroids = kmeans(x, n_lists, self.n_iter, self.seed, spherical=True)
+        labels = _assign(x, self.centroids, spherical=True)
+
+        # Store vectors grouped by list (CSR layout) so each probed list is one contiguous slice
+        order = np.argsort(labels, kind='stable')
+        counts = np.bincount(labels, minlength=len(self.centroids))
+        self.list_offsets = np.concatenate(([0], np.cumsum(counts))).astype(np.int64)
+        self.ids = order.astype(np.int64)
+        if self.pq_subvectors:
+            self._train_pq(x)
+            self.codes = self._encode_pq(x[order])
+            self.vectors = None
+        else:
+            self.vectors = x[order]
+        return self
+
+    def _train_pq(self, x):
+        m = self.pq_subvectors
+        if x.shape[1] % m:
+            raise ValueError(f"Embedding dimension {x.shape[1]} is not divisible by pq_subvectors={m}.")
+        sub_dim = x.shape[1] // m
+        self.codebooks = np.stack([
+            kmeans(x[:, j * sub_dim:(j + 1) * sub_dim], 256, self.n_iter, self.seed + j, spherical=False)
+            for j in range(m)
+        ])
+
+    def _encode_pq(self, x):
+        m, _, sub_dim = self.codebooks.shape
+        codes = np.empty((len(x), m), dtype=np.uint8)
+        for j in range(m):
+            codes[:, j] = _assign(x[:, j * sub_dim:(j + 1) * sub_dim], self.codebooks[j], spherical=False)
+        return codes
+
+    def search(self, query, k, n_probe=None, rerank_vectors=None, rerank_factor=4):
+        """
+        Returns (ids, scores) of the approximate top-k corpus vectors for `query`, best first.
+
+        Args:
+            query (array): Query embedding.
+            k (int): Number of neighbours to return.
+            n_probe (int): Lists to scan; defaults to the index setting.
+            rerank_vectors (array): Full corpus embeddings; PQ hits are re-scored exactly with them.
+            rerank_factor (int): How many PQ hits per requested neighbour are re-scored.
+        """
+        q = _normalize(np.asarray(query).reshape(-1))
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        probe = np.argpartition(-(self.centroids @ q), n_probe - 1)[:n_probe]
+        rows = np.concatenate([np.arange(self.list_offsets[c], self.list_offsets[c + 1]) for c in probe])
+        if len(rows) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if self.codes is None:
+            scores = self.vectors[rows] @ q
+        else:
+            m, _, sub_dim = self.codebooks.shape
+            table = np.einsum('mcd,md->mc', self.codebooks, q.reshape(m, sub_dim))
+            scores = table[np.arange(m), self.codes[rows]].sum(axis=1)
+            if rerank_vectors is not None:
+                shortlist = min(len(rows), k * rerank_factor)
+                top = np.argpartition(-scores, shortlist - 1)[:shortlist]
+                rows = rows[top]
+                scores = _normalize(np.asarray(rerank_vectors)[self.ids[rows]]) @ q
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return self.ids[rows[top]], scores[top].astype(np.float32)
+
+    def save(self, index_dir, metadata=None):
+        """Persists the index, plus any chunk metadata that should travel with it."""
+        os.makedirs(index_dir, exist_ok=True)
+        arrays = {"centroids": self.centroids, "list_offsets": self.list_offsets, "ids": self.ids}
+        if self.codes is not None:
+            arrays.update(codes=self.codes, codebooks=self.codebooks)
+        else:
+            arrays["vectors"] = self.vectors
+        np.savez(os.path.join(index_dir, INDEX_ARRAYS), **arrays)
+        self.metadata = metadata if metadata is not None else self.metadata
+        params = {"n_probe": self.n_probe, "pq_subvectors": self.pq_subvectors, "n_iter": self.n_iter,
+                  "seed": self.seed, "metadata": self.metadata}
+        with open(os.path.join(index_dir, INDEX_META), 'w', encoding='utf-8') as f:
+            json.dump(params, f, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, index_dir):
+        """Loads a saved index, or returns None if `index_dir` holds none."""
+        meta_path = os.path.join(index_dir, INDEX_META)
+        arrays_path = os.path.join(index_dir, INDEX_ARRAYS)
+        if not os.path.exists(meta_path) or not os.path.exists(arrays_path):
+            return None
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            params = json.load(f)
+        index = cls(n_probe=params["n_probe"], pq_subvectors=params["pq_subvectors"],
+                    n_iter=params["n_iter"], seed=params["seed"])
+        index.metadata = params["metadata"]
+        with np.load(arrays_path) as arrays:
+            index.centroids = arrays["centroids"]
+            index.list_offsets = arrays["list_offsets"]
+            index.ids = arrays["ids"]
+            index.n_lists = len(index.centroids)
+            if "codes" in arrays:
+                index.codes = arrays["codes"]
+                index.codebooks = arrays["codebooks"]
+            else:
+                index.vectors = arrays["vectors"]
+        return index
@@ -0,0 +1,76 @@
+"""
+Recall and latency benchmark for the IVF index in ann_index.py.
+
+Builds IVF-Flat and IVF-PQ indexes over synthetic clustered embeddings and compares their
+top-k candidate pools with exact search, the way process_collection uses them to feed MMR.
+
+    python bench_ann.py
+"""
+import time
+import numpy as np
+from ann_index import IVFIndex, _normalize
+from config import TOP_K_SECTIONS, ANN_N_PROBE
+
+CORPUS_SIZES = [10000, 50000]
+EMBEDDING_DIM = 384
+N_QUERIES = 50
+N_TOPICS = 500
+POOL_SIZE = TOP_K_SECTIONS * 5
+
+
+def synthetic_embeddings(topics, n, rng):
+    """Unit vectors drawn around topic centres, mimicking sections of related documents."""
+    labels = rng.integers(0, len(topics), size=n)
+    noise = rng.standard_normal((n, EMBEDDING_DIM)) / np.sqrt(EMBEDDING_DIM)
+    return _normalize(topics[labels] + 0.8 * noise)
+
+
+def exact_search(corpus, query, k):
+    scores = corpus @ query
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top])]
+
+
+def measure(search, queries, truth):
+    latencies, recalls = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = search(query)
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(set(found.tolist()) & set(expected.tolist())) / len(expected))
+    return np.mean(recalls), np.median(latencies) * 1000
+
+
+def run_benchmark():
+    rng = np.random.default_rng(0)
+    print(f"{'chunks':>7} {'method':>16} {'build (s)':>10} {'recall@' + str(POOL_SIZE):>10} {'query (ms)':>11}")
+    for n in CORPUS_SIZES:
+        topics = _normalize(rng.standard_normal((N_TOPICS, EMBEDDING_DIM)))
+        corpus = synthetic_embeddings(topics, n, rng)
+        queries = synthetic_embeddings(topics, N_QUERIES, rng)
+        truth = [exact_search(corpus, q, POOL_SIZE) for q in queries]
+        _, exact_ms = measure(lambda q: exact_search(corpus, q, POOL_SIZE), queries, truth)
+        print(f"{n:>7} {'exact':>16} {'-':>10} {1.0:>10.3f} {exact_ms:>11.2f}")
+
+        variants = [
+            ("ivf-flat", IVFIndex(n_probe=ANN_N_PROBE), {}),
+            ("ivf-pq", IVFIndex(n_probe=ANN_N_PROBE, pq_subvectors=48), {}),
+            ("ivf-pq+rerank", None, {"rerank_vectors": corpus}),
+        ]
+        pq_index = None
+        for name, index, kwargs in variants:
+            build_time = 0.0
+            if index is None:
+                index = pq_index
+            else:
+                start = time.perf_counter()
+                index.build(corpus)
+                build_time = time.perf_counter() - start
+                if index.pq_subvectors:
+                    pq_index = index
+            recall, query_ms = measure(lambda q: index.search(q, POOL_SIZE, **kwargs)[0], queries, truth)
+            print(f"{n:>7} {name:>16} {build_time:>10.2f} {recall:>10.3f} {query_ms:>11.2f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,73 @@
+"""
+CPU throughput benchmark for length-bucketed encoding (length_buckets.py).
+
+Encodes a synthetic mix of short and very long sections, as outline chunking produces, once
+in arrival order at BATCH_SIZE (plain `model.encode`, long texts truncated), with
+token-budgeted, length-sorted batches (the default; same truncation) and with batching plus
+windowed long sections (ENCODE_WINDOW_LONG_SECTIONS).
+
+    python bench_encoding.py
+"""
+import time
+import numpy as np
+import torch
+from sentence_transformers import SentenceTransformer
+from config import BATCH_SIZE, ENCODE_TOKEN_BUDGET, ENCODE_MAX_BATCH, ENCODE_WINDOW_OVERLAP
+from length_buckets import encode_length_bucketed, split_windows
+from retrieval import MODEL_PATH
+
+N_TEXTS = 1000
+WORDS = ("trip city beach dinner hotel museum budget group friends plan route train coast "
+         "wine old town festival market harbour castle night tour lunch walk").split()
+
+
+def synthetic_sections(rng):
+    """Section texts with a long-tailed word count: many short sections, a few huge ones."""
+    counts = rng.lognormal(3.5, 1.3, N_TEXTS).clip(3, 4000).astype(int)
+    return [" ".join(rng.choice(WORDS, n)) for n in counts]
+
+
+def timed(encode):
+    start = time.perf_counter()
+    encode()
+    return time.perf_counter() - start
+
+
+def run_benchmark():
+    model = SentenceTransformer(MODEL_PATH, device='cpu')
+    texts = synthetic_sections(np.random.default_rng(0))
+    pieces, owners, lengths = split_windows(model, texts, ENCODE_WINDOW_OVERLAP)
+    limit = model.max_seq_length
+    truncated_tokens = int(np.minimum(np.bincount(owners, weights=lengths), limit).sum())
+    print(f"{N_TEXTS} texts, {int((np.bincount(owners) > 1).sum())} over the {limit}-token limit, "
+          f"torch threads: {torch.get_num_threads()}")
+
+    model.encode(texts[:8], show_progress_bar=False)  # warm up
+    plain = timed(lambda: model.encode(texts, batch_size=BATCH_SIZE, show_progress_bar=False))
+    bucketed = timed(lambda: encode_length_bucketed(
+        model, texts, ENCODE_TOKEN_BUDGET, ENCODE_MAX_BATCH, None))
+    windowed = timed(lambda: encode_length_bucketed(
+        model, texts, ENCODE_TOKEN_BUDGET, ENCODE_MAX_BATCH, ENCODE_WINDOW_OVERLAP))
+
+    # Like-for-like batching comparison on the texts that fit the model without windowing
+    fits = np.bincount(owners) == 1
+    short_texts = [text for text, ok in zip(texts, fits) if ok]
+    short_tokens = int(np.bincount(owners, weights=lengths)[fits].sum())
+    plain_short = timed(lambda: model.encode(short_texts, batch_size=BATCH_SIZE, show_progress_bar=False))
+    bucketed_short = timed(lambda: encode_length_bucketed(
+        model, short_texts, ENCODE_TOKEN_BUDGET, ENCODE_MAX_BATCH, None))
+
+    print(f"{'method':>17} {'time (s)':>9} {'texts/s':>9} {'tokens':>8} {'tokens/s':>9}")
+    rows = [
+        ("plain", plain, N_TEXTS, truncated_tokens),
+        ("bucketed", bucketed, N_TEXTS, truncated_tokens),
+        ("bucketed+windows", windowed, N_TEXTS, int(lengths.sum())),
+        ("plain (fits)", plain_short, len(short_texts), short_tokens),
+        ("bucketed (fits)", bucketed_short, len(short_texts), short_tokens),
+    ]
+    for name, seconds, n_texts, tokens in rows:
+        print(f"{name:>17} {seconds:>9.2f} {n_texts / seconds:>9.1f} {tokens:>8} {tokens / seconds:>9.0f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
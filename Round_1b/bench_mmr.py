@@ -0,0 +1,72 @@
+"""
+Micro-benchmark for DocumentRetriever._run_mmr.
+
+Compares the vectorized MMR against the original per-pair implementation on random
+embeddings across candidate pool sizes and checks that both select the same chunks.
+
+    python bench_mmr.py
+"""
+import time
+import numpy as np
+import torch
+from sentence_transformers import util
+from config import MMR_DIVERSITY, TOP_K_SECTIONS
+from retrieval import DocumentRetriever, import_torch
+
+POOL_SIZES = [25, 100, 250, 500, 1000]
+EMBEDDING_DIM = 384
+CORPUS_SIZE = 5000
+REPEATS = 3
+
+
+def reference_mmr(query_emb, corpus_embs, candidate_indices, top_k):
+    """The original O(top_k^2 * n) implementation, kept as the correctness reference."""
+    selected_indices = []
+    while len(selected_indices) < min(top_k, len(candidate_indices)):
+        best_score = -np.inf
+        best_idx = -1
+        for i in range(len(candidate_indices)):
+            if i in selected_indices: continue
+            relevance_score = util.cos_sim(query_emb, corpus_embs[candidate_indices[i]]).item()
+            if not selected_indices:
+                redundancy = 0
+            else:
+                redundancy = max([util.cos_sim(corpus_embs[candidate_indices[i]], corpus_embs[candidate_indices[j]]).item() for j in selected_indices])
+            mmr_score = MMR_DIVERSITY * relevance_score - (1 - MMR_DIVERSITY) * redundancy
+            if mmr_score > best_score:
+                best_score = mmr_score
+                best_idx = i
+        if best_idx != -1:
+            selected_indices.append(best_idx)
+    return [candidate_indices[i] for i in selected_indices]
+
+
+def time_call(fn, *args):
+    best = float('inf')
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def run_benchmark(top_k=TOP_K_SECTIONS):
+    generator = torch.Generator().manual_seed(0)
+    corpus_embs = torch.randn(CORPUS_SIZE, EMBEDDING_DIM, generator=generator)
+    query_emb = torch.randn(EMBEDDING_DIM, generator=generator)
+    # _run_mmr does not touch the model, so skip loading it
+    import_torch()
+    retriever = DocumentRetriever.__new__(DocumentRetriever)
+
+    print(f"{'pool':>6} {'reference (ms)':>15} {'vectorized (ms)':>16} {'speedup':>8} {'match':>6}")
+    for pool_size in POOL_SIZES:
+        hits = util.semantic_search(query_emb, corpus_embs, top_k=pool_size)[0]
+        candidate_indices = [hit['corpus_id'] for hit in hits]
+        expected, reference_time = time_call(reference_mmr, query_emb, corpus_embs, candidate_indices, top_k)
+        selected, vectorized_time = time_call(retriever._run_mmr, query_emb, corpus_embs, candidate_indices, top_k)
+        print(f"{pool_size:>6} {reference_time * 1000:>15.2f} {vectorized_time * 1000:>16.2f} "
+              f"{reference_time / vectorized_time:>7.1f}x {str(selected == expected):>6}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
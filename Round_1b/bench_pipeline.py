@@ -0,0 +1,165 @@
+"""
+End-to-end benchmark suite over synthetic PDF collections (synthetic_corpus.py).
+
+For every corpus size it times each pipeline stage separately — Round 1a's
+`get_text_styles` and `extract_outline`, chunking with `_extract_sections_from_outline`,
+chunk encoding with `_embed_texts`, candidate search plus `_run_mmr`, and summarization —
+and scores Round 1a's outlines against the generated headings. Results are written as
+JSON so runs from different commits can be compared.
+
+    python bench_pipeline.py [--repeats 3] [--output benchmark_results]
+    python bench_pipeline.py --compare OLD.json NEW.json
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import tempfile
+import platform
+import subprocess
+from datetime import datetime
+import numpy as np
+import config
+config.EMBEDDING_STORE_DIR = None  # time the encoder, not the store; must be set before retrieval is imported
+config.DEDUP_THRESHOLD = None
+from config import PERSONA, JOB_TO_BE_DONE, TOP_K_SECTIONS, TOP_K_SUBSECTIONS
+from retrieval import DocumentRetriever
+from main import import_round_1a
+from synthetic_corpus import generate_corpus, outline_accuracy
+
+# (documents, pages per document)
+CORPUS_SIZES = [(2, 10), (5, 20), (10, 40)]
+STAGES = ["get_text_styles", "extract_outline", "chunking", "embed_chunks", "mmr", "summarize"]
+REGRESSION_RATIO = 1.2
+SEED = 0
+
+
+def best_time(fn, repeats):
+    """Runs `fn` `repeats` times and returns (last result, fastest wall time)."""
+    best, result = float('inf'), None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return result, best
+
+
+def bench_corpus(retriever, process, documents, pages, repeats):
+    stages = dict.fromkeys(STAGES, 0.0)
+    accuracy = []
+    all_chunks = []
+    with tempfile.TemporaryDirectory() as corpus_dir:
+        expected = generate_corpus(corpus_dir, documents, pages, seed=SEED)
+        for filename, expected_outline in expected.items():
+            path = os.path.join(corpus_dir, filename)
+            _, seconds = best_time(lambda: process.get_text_styles(path), repeats)
+            stages["get_text_styles"] += seconds
+            outline, seconds = best_time(lambda: process.extract_outline(path), repeats)
+            stages["extract_outline"] += seconds
+            accuracy.append(outline_accuracy(expected_outline, outline))
+            chunks, seconds = best_time(
+                lambda: DocumentRetriever._extract_sections_from_outline(path, filename, outline), repeats)
+            stages["chunking"] += seconds
+            all_chunks.extend(chunks)
+
+    texts = [chunk['text'] for chunk in all_chunks]
+    embeddings, stages["embed_chunks"] = best_time(lambda: retriever._embed_texts(texts), repeats)
+    query_embedding = retriever._embed_query(PERSONA, JOB_TO_BE_DONE)
+    corpus = {"chunks": all_chunks, "embeddings": embeddings,
+              "fingerprint": hashlib.sha1(embeddings.cpu().numpy().tobytes()).hexdigest()}
+
+    def rank():
+        pool = retriever._candidate_pool(query_embedding, corpus, TOP_K_SECTIONS * 5)
+        return retriever._run_mmr(query_embedding, embeddings, pool, top_k=TOP_K_SECTIONS)
+    selected, stages["mmr"] = best_time(rank, repeats)
+    sections = [all_chunks[i]['original_text'] for i in selected[:TOP_K_SUBSECTIONS]]
+    _, stages["summarize"] = best_time(lambda: retriever._summarize_sections(sections, query_embedding), repeats)
+
+    return {
+        "documents": documents,
+        "pages": pages,
+        "chunks": len(all_chunks),
+        "stages": stages,
+        "outline_accuracy": {
+            key: float(np.mean([a[key] for a in accuracy]))
+            for key in ("precision", "recall", "f1", "level_accuracy", "title_match")
+        },
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(repeats=3, output_dir="benchmark_results"):
+    DocumentRetriever.show_progress = False
+    retriever = DocumentRetriever()
+    process = import_round_1a()
+    results = {
+        "commit": _git_commit(),
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeats": repeats,
+        "seed": SEED,
+        "sizes": [],
+    }
+    print(f"\n{'docs':>5} {'pages':>6} {'chunks':>7} " + " ".join(f"{stage:>15}" for stage in STAGES) + f" {'outline F1':>11}")
+    for documents, pages in CORPUS_SIZES:
+        size = bench_corpus(retriever, process, documents, pages, repeats)
+        results["sizes"].append(size)
+        print(f"{documents:>5} {pages:>6} {size['chunks']:>7} "
+              + " ".join(f"{size['stages'][stage]:>14.3f}s" for stage in STAGES)
+              + f" {size['outline_accuracy']['f1']:>11.3f}")
+
+    os.makedirs(output_dir, exist_ok=True)
+    output_path = os.path.join(output_dir, f"bench_{results['commit'] or 'local'}_{int(time.time())}.json")
+    with open(output_path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"💾 Results saved to: {output_path}")
+    return results
+
+
+def compare(old_path, new_path):
+    """Prints per-stage time ratios and outline-accuracy changes between two result files."""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"Comparing {old.get('commit')} -> {new.get('commit')} (new/old time ratio)")
+    old_sizes = {(s["documents"], s["pages"]): s for s in old["sizes"]}
+    regressions = 0
+    for size in new["sizes"]:
+        before = old_sizes.get((size["documents"], size["pages"]))
+        if before is None:
+            continue
+        print(f"\n{size['documents']} docs x {size['pages']} pages")
+        for stage in STAGES:
+            ratio = size["stages"][stage] / max(before["stages"][stage], 1e-9)
+            flag = " ⚠️" if ratio > REGRESSION_RATIO else ""
+            regressions += bool(flag)
+            print(f"  {stage:>16} {before['stages'][stage]:>9.3f}s -> {size['stages'][stage]:>9.3f}s  {ratio:>5.2f}x{flag}")
+        for key, value in size["outline_accuracy"].items():
+            delta = value - before["outline_accuracy"][key]
+            flag = " ⚠️" if delta < 0 else ""
+            regressions += bool(flag)
+            print(f"  {key:>16} {before['outline_accuracy'][key]:>9.3f} -> {value:>9.3f}{flag}")
+    print(f"\n{'❌' if regressions else '✅'} {regressions} regression(s)")
+    return regressions
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--compare" in args:
+        i = args.index("--compare")
+        sys.exit(1 if compare(args[i + 1], args[i + 2]) else 0)
+    run_suite(
+        repeats=int(args[args.index("--repeats") + 1]) if "--repeats" in args else 3,
+        output_dir=args[args.index("--output") + 1] if "--output" in args else "benchmark_results",
+    )
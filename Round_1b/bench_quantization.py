@@ -0,0 +1,83 @@
+"""
+Accuracy check and CPU benchmark for the int8 quantized model (QUANTIZE_INT8).
+
+Embeds the reference collection (PDFs in INPUT_DIR with outlines in OUTLINE_DIR) and the
+configured persona/job query with the float32 model and with the dynamically quantized
+model, then compares encode time, per-chunk cosine agreement, the MMR candidate pool and
+the final section ranking. Exits with status 1 when the quantized model drifts beyond
+MIN_CHUNK_COSINE or MIN_POOL_OVERLAP.
+
+    python bench_quantization.py
+"""
+import os
+import sys
+import time
+import hashlib
+import numpy as np
+from config import INPUT_DIR, PERSONA, JOB_TO_BE_DONE, TOP_K_SECTIONS
+import retrieval
+from retrieval import DocumentRetriever, MODEL_PATH
+
+MIN_CHUNK_COSINE = 0.98
+MIN_POOL_OVERLAP = 0.8
+
+
+def rank(retriever, model, texts, all_chunks, query_text):
+    """Encodes the corpus and query with `model` and returns (seconds, chunk_embs, pool, top)."""
+    retriever._model = model
+    start = time.perf_counter()
+    chunk_embeddings = retriever._embed_texts(texts)
+    elapsed = time.perf_counter() - start
+    query_embedding = retriever._embed_texts([query_text])[0]
+    corpus = {"chunks": all_chunks, "embeddings": chunk_embeddings,
+              "fingerprint": hashlib.sha1(chunk_embeddings.cpu().numpy().tobytes()).hexdigest()}
+    pool = retriever._candidate_pool(query_embedding, corpus, TOP_K_SECTIONS * 5)
+    top = retriever._run_mmr(query_embedding, chunk_embeddings, pool, TOP_K_SECTIONS)
+    scores = retrieval.util.cos_sim(query_embedding, chunk_embeddings)[0].cpu().numpy()
+    return elapsed, chunk_embeddings.cpu().numpy(), pool, top, scores
+
+
+def run_check():
+    DocumentRetriever.show_progress = False
+    retriever = DocumentRetriever()
+    retriever.embedding_store = None
+    pdf_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith('.pdf'))
+    all_chunks = retriever._load_outline_chunks(pdf_files)
+    if not all_chunks:
+        print("❌ No chunks in the reference collection; run Round 1a on INPUT_DIR first.")
+        return 1
+    texts = [chunk['text'] for chunk in all_chunks]
+    query_text = retriever._hyde_text(PERSONA, JOB_TO_BE_DONE)
+
+    float_model = retrieval.SentenceTransformer(MODEL_PATH, device=retriever.device)
+    int8_model = retriever._load_quantized_model()
+    float_model.encode(["warm up"], show_progress_bar=False)
+    int8_model.encode(["warm up"], show_progress_bar=False)
+
+    float_time, float_embs, float_pool, float_top, float_scores = rank(retriever, float_model, texts, all_chunks, query_text)
+    int8_time, int8_embs, int8_pool, int8_top, int8_scores = rank(retriever, int8_model, texts, all_chunks, query_text)
+
+    cosines = np.sum(float_embs * int8_embs, axis=1) / (
+        np.linalg.norm(float_embs, axis=1) * np.linalg.norm(int8_embs, axis=1))
+    pool_overlap = len(set(float_pool) & set(int8_pool)) / max(1, len(float_pool))
+
+    print(f"\n🔬 Reference corpus: {len(texts)} chunks from {len(pdf_files)} documents, "
+          f"{retrieval.torch.get_num_threads()} torch threads")
+    print(f"{'model':>8} {'encode (s)':>11} {'chunks/s':>9}")
+    print(f"{'float32':>8} {float_time:>11.2f} {len(texts) / float_time:>9.1f}")
+    print(f"{'int8':>8} {int8_time:>11.2f} {len(texts) / int8_time:>9.1f}   ({float_time / int8_time:.2f}x)")
+    print(f"Chunk cosine float32 vs int8: mean {cosines.mean():.4f}, min {cosines.min():.4f}")
+    print(f"Query similarity scores: max abs diff {np.abs(float_scores - int8_scores).max():.4f}")
+    print(f"Candidate pool overlap: {pool_overlap:.2%}")
+    print(f"Top-{TOP_K_SECTIONS} sections identical: {float_top == int8_top} "
+          f"(shared {len(set(float_top) & set(int8_top))}/{len(float_top)})")
+
+    if cosines.min() < MIN_CHUNK_COSINE or pool_overlap < MIN_POOL_OVERLAP:
+        print("❌ Quantized model drifts beyond tolerance.")
+        return 1
+    print("✅ Quantized model within tolerance.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(run_check())
@@ -0,0 +1,59 @@
+"""
+Wall time and peak memory of streaming vs batch corpus building.
+
+Runs each mode in a fresh process over the reference collection (PDFs in INPUT_DIR with
+outlines in OUTLINE_DIR), with the embedding store disabled so every chunk is encoded, and
+reports wall time to the first answer and peak RSS of the main and parser worker processes.
+
+    python bench_streaming.py
+"""
+import sys
+import json
+import subprocess
+
+MODES = ["batch", "streaming"]
+
+
+def run_mode(mode):
+    """Child process: builds the corpus in `mode`, answers the configured query, prints stats."""
+    import os
+    import time
+    import config
+    config.EMBEDDING_STORE_DIR = None  # must be set before retrieval imports it
+    config.RESULT_CACHE_DIR = None
+    from config import INPUT_DIR, PERSONA, JOB_TO_BE_DONE, TOP_K_SECTIONS, TOP_K_SUBSECTIONS, OVERLAP_MODEL_LOAD
+    from retrieval import DocumentRetriever
+    from utils import peak_rss_mb
+
+    DocumentRetriever.show_progress = False
+    start = time.perf_counter()
+    retriever = DocumentRetriever(background_load=OVERLAP_MODEL_LOAD)
+    pdf_files = sorted(f for f in os.listdir(INPUT_DIR) if f.lower().endswith('.pdf'))
+    if mode == "streaming":
+        corpus = retriever.build_corpus_streaming(pdf_files)
+    else:
+        corpus = retriever.build_corpus(pdf_files)
+    retriever.answer_query(corpus, PERSONA, JOB_TO_BE_DONE, TOP_K_SECTIONS, TOP_K_SUBSECTIONS)
+    print(json.dumps({
+        "mode": mode,
+        "chunks": len(corpus["chunks"]) if corpus else 0,
+        "wall_s": time.perf_counter() - start,
+        "peak_rss_mb": peak_rss_mb(),
+        "worker_peak_rss_mb": retriever.stream_stats.get("worker_peak_rss_mb", 0.0),
+    }))
+
+
+def run_benchmark():
+    print(f"{'mode':>10} {'chunks':>7} {'wall (s)':>9} {'peak RSS (MB)':>14} {'worker RSS (MB)':>16}")
+    for mode in MODES:
+        output = subprocess.run([sys.executable, __file__, "--child", mode], capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        worker = f"{result['worker_peak_rss_mb']:.0f}" if result['worker_peak_rss_mb'] else "-"
+        print(f"{mode:>10} {result['chunks']:>7} {result['wall_s']:>9.2f} {result['peak_rss_mb']:>14.0f} {worker:>16}")
+
+
+if __name__ == "__main__":
+    if "--child" in sys.argv:
+        run_mode(sys.argv[sys.argv.index("--child") + 1])
+    else:
+        run_benchmark()
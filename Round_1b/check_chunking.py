@@ -0,0 +1,114 @@
+"""
+Equivalence check for outline-based chunking on real PDFs.
+
+Chunks every PDF in a directory with `_extract_sections_from_outline` and with the original
+implementation (a `search_for` per section boundary and `get_text(clip=...)` for every page
+of every section), reports per-document timings, and prints the first difference for any
+document whose chunks are not identical. Outlines are read from OUTLINE_DIR when present and
+extracted with Round 1a otherwise.
+
+    python check_chunking.py [PDF_DIR]
+"""
+import os
+import re
+import sys
+import json
+import time
+import fitz  # PyMuPDF
+from config import INPUT_DIR, OUTLINE_DIR
+from retrieval import DocumentRetriever
+from main import import_round_1a
+
+
+def reference_sections(filepath, filename, outline_data):
+    """The original per-section extraction, kept as the correctness reference."""
+    sections = []
+    doc = fitz.open(filepath)
+    headings = [{"level": "H0", "text": outline_data.get("title", ""), "page": 1}] + outline_data["outline"]
+
+    for i, current_heading in enumerate(headings):
+        start_page = current_heading["page"]
+        start_y = 0
+        search_results = doc.load_page(start_page - 1).search_for(current_heading["text"])
+        if search_results:
+            start_y = search_results[0].y1
+
+        end_page = len(doc)
+        end_y = doc[end_page - 1].rect.height
+        for next_heading in headings[i+1:]:
+            if next_heading["level"] <= current_heading["level"]:
+                end_page = next_heading["page"]
+                next_search_results = doc[end_page - 1].search_for(next_heading["text"])
+                if next_search_results:
+                    end_y = next_search_results[0].y0
+                break
+
+        content_text = ""
+        for page_num in range(start_page, end_page + 1):
+            page = doc.load_page(page_num - 1)
+            clip_rect = fitz.Rect(0, 0, page.rect.width, page.rect.height)
+            if page_num == start_page:
+                clip_rect.y0 = start_y
+            if page_num == end_page:
+                clip_rect.y1 = end_y
+            content_text += page.get_text(clip=clip_rect) + " "
+        content_text = re.sub(r'\s+', ' ', content_text).strip()
+
+        if len(content_text.split()) > 10:
+            sections.append({
+                "text": f"Section: {current_heading['text']}. Content: {content_text}",
+                "original_text": content_text,
+                "metadata": {
+                    "document": filename,
+                    "section_title": current_heading['text'],
+                    "page_number": current_heading['page']
+                }
+            })
+    doc.close()
+    return sections
+
+
+def load_outline(process, pdf_dir, filename):
+    outline_path = os.path.join(OUTLINE_DIR, os.path.splitext(filename)[0] + '.json')
+    if os.path.exists(outline_path):
+        with open(outline_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return process.extract_outline(os.path.join(pdf_dir, filename))
+
+
+def first_difference(expected, actual):
+    for position, (want, got) in enumerate(zip(expected, actual)):
+        if want != got:
+            return f"chunk {position} ('{want['metadata']['section_title']}'): {want['original_text'][-120:]!r} != {got['original_text'][-120:]!r}"
+    return f"{len(expected)} reference chunks, {len(actual)} chunks"
+
+
+def run_check(pdf_dir=INPUT_DIR):
+    process = import_round_1a()
+    pdf_files = sorted(f for f in os.listdir(pdf_dir) if f.lower().endswith('.pdf'))
+    mismatches = 0
+    totals = [0.0, 0.0]
+    print(f"{'document':<40} {'chunks':>7} {'reference (s)':>14} {'indexed (s)':>12} {'match':>6}")
+    for filename in pdf_files:
+        filepath = os.path.join(pdf_dir, filename)
+        outline = load_outline(process, pdf_dir, filename)
+        start = time.perf_counter()
+        expected = reference_sections(filepath, filename, outline)
+        reference_time = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = DocumentRetriever._extract_sections_from_outline(filepath, filename, outline)
+        indexed_time = time.perf_counter() - start
+        totals[0] += reference_time
+        totals[1] += indexed_time
+        match = actual == expected
+        mismatches += not match
+        print(f"{filename[:40]:<40} {len(expected):>7} {reference_time:>14.3f} {indexed_time:>12.3f} {str(match):>6}")
+        if not match:
+            print(f"   ❌ {first_difference(expected, actual)}")
+    print(f"{'total':<40} {'':>7} {totals[0]:>14.3f} {totals[1]:>12.3f}")
+    print(f"\n{'❌' if mismatches else '✅'} {mismatches} of {len(pdf_files)} document(s) differ")
+    return mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(1 if run_check(sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR) else 0)
@@ -1,11 +1,64 @@
 MODEL_NAME = 'all-MiniLM-L6-v2' 
 BATCH_SIZE = 32  # Optimized for CPU performance
+# Length-bucketed encoding: texts are sorted by token count and batched up to this many
+# padded tokens. None encodes in arrival order at BATCH_SIZE. Either way sections over the
+# model limit are truncated, so rankings do not depend on this setting.
+ENCODE_TOKEN_BUDGET = 8192
+ENCODE_MAX_BATCH = 256
+# Opt-in: embed sections over the model limit in overlapping windows and pool them instead
+# of truncating. Changes rankings and re-encodes every nested section in full, which
+# multiplies encode cost on documents with deep outlines. Requires ENCODE_TOKEN_BUDGET.
+ENCODE_WINDOW_LONG_SECTIONS = False
+ENCODE_WINDOW_OVERLAP = 32
+# Opt-in dynamic int8 quantization of the model's linear layers for faster CPU inference.
+# The quantized model is cached in QUANTIZED_MODEL_DIR (None re-quantizes on every load).
+QUANTIZE_INT8 = False
+QUANTIZED_MODEL_DIR = "./embedding_model_int8"
+# torch intra-op threads; None uses the CPUs available to the container
+TORCH_NUM_THREADS = None
+# Import torch and load/warm up the model on a background thread while PDFs are parsed
+OVERLAP_MODEL_LOAD = True
 
 # --- Directory Paths ---
 # These paths are relative to the docker container's working directory.
 INPUT_DIR = "input"
 OUTPUT_DIR = "output"
 OUTLINE_DIR = "./output_round1a"
+# Per-stage timings, counters and peak RSS are written here (inside OUTPUT_DIR) after each
+# run; None disables the report.
+METRICS_REPORT = "metrics.json"
+
+# --- Embedding Store ---
+# Chunk embeddings are persisted here, keyed by chunk text and model identity,
+# so unchanged documents are not re-encoded. Set to None to always re-encode.
+EMBEDDING_STORE_DIR = "./embedding_store"
+EMBEDDING_STORE_DTYPE = "float32"  # "float16" halves the store size at a small precision cost
+
+# --- Query Caches ---
+# HyDE query embeddings are kept in an in-memory LRU of this many entries, and analysis
+# results are persisted in RESULT_CACHE_DIR keyed by the corpus fingerprint (PDF and outline
+# file hashes, model identity, chunking and dedup settings), persona, job and retrieval
+# parameters. None disables either cache.
+QUERY_EMBEDDING_CACHE_SIZE = 256
+RESULT_CACHE_DIR = "./result_cache"
+RESULT_CACHE_MAX_ENTRIES = 1000
+
+# --- Near-Duplicate Chunks ---
+# Chunks whose estimated Jaccard similarity (MinHash over word shingles, LSH banding)
+# reaches DEDUP_THRESHOLD are embedded once; the duplicates are reported with the
+# representative section. None disables deduplication.
+DEDUP_THRESHOLD = 0.85
+DEDUP_NUM_PERM = 128       # MinHash signature length
+DEDUP_BANDS = 16           # LSH bands; more bands compare more candidate pairs
+DEDUP_SHINGLE_WORDS = 3
+
+# --- Streaming Mode ---
+# Parser worker processes chunk documents while the main process encodes them; chunk
+# text is spooled to a temporary file (in STREAM_SPOOL_DIR, None = system temp).
+STREAM_WORKERS = 2
+STREAM_QUEUE_DOCUMENTS = 4   # Parsed documents allowed to wait for the encoder
+STREAM_ENCODE_BATCH = 256    # Chunk texts per encoder batch
+STREAM_SPOOL_DIR = None
 
 # --- Persona & Job Definition ---
 # These values will be used to formulate the master query.
@@ -13,6 +66,14 @@ OUTLINE_DIR = "./output_round1a"
 PERSONA = "Travel Planner"
 JOB_TO_BE_DONE = "Plan a trip of 4 days for a group of 10 college friends."
 
+# --- Approximate Nearest-Neighbour Index ---
+# Collections with at least this many chunks use an IVF index instead of exact search
+# for the MMR candidate pool (None always searches exactly).
+ANN_MIN_CHUNKS = 20000
+ANN_N_PROBE = 16          # Inverted lists scanned per query
+ANN_PQ_SUBVECTORS = 0     # > 0 stores product-quantized codes (must divide the embedding size)
+ANN_INDEX_DIR = "./ann_index"
+
 # --- Retrieval Parameters ---
 TOP_K_SECTIONS = 5      # How many main sections to retrieve from MMR
 TOP_K_SUBSECTIONS = 5  # How many top sections to summarize
@@ -0,0 +1,101 @@
+import re
+import zlib
+import numpy as np
+
+WORD_PATTERN = re.compile(r'\w+')
+# Shingles hashed per step of a signature; bounds its temporary matrix to
+# SIGNATURE_BLOCK x num_perm values however long the text is
+SIGNATURE_BLOCK = 1024
+
+
+def shingle_hashes(text, shingle_words):
+    """CRC32 hashes of the distinct lower-cased word n-grams (shingles) of `text`."""
+    words = WORD_PATTERN.findall(text.lower())
+    if len(words) <= shingle_words:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_words]) for i in range(len(words) - shingle_words + 1)}
+    return np.fromiter((zlib.crc32(s.encode('utf-8')) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+class MinHashDeduplicator:
+    """
+    Groups near-duplicate texts incrementally with MinHash signatures and LSH banding.
+
+    Every text gets a `num_perm`-value MinHash signature over its word shingles; the signature
+    is cut into `bands` bands, and texts sharing any band bucket with an earlier representative
+    are compared with it. A text joins the group of the candidate with the highest estimated
+    Jaccard similarity if that similarity reaches `threshold`; otherwise it becomes a new
+    representative. The first text of a group is always its representative.
+
+    Texts from the same `source` are never grouped: within one document a parent section
+    with a single child is nearly the child's text, yet both must stay retrievable.
+    """
+    def __init__(self, threshold=0.85, num_perm=128, bands=16, shingle_words=3, seed=0):
+        if num_perm % bands:
+            raise ValueError(f"num_perm={num_perm} is not divisible by bands={bands}.")
+        rng = np.random.default_rng(seed)
+        # Multiply-shift hash family: odd 64-bit multipliers, keep the high 32 bits
+        self._multipliers = rng.integers(1, 2**63, num_perm, dtype=np.uint64) | np.uint64(1)
+        self._offsets = rng.integers(0, 2**63, num_perm, dtype=np.uint64)
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_words = shingle_words
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = []
+        self._sources = []
+        self.seen = 0
+        self.duplicates = 0
+
+    def signature(self, text):
+        hashes = shingle_hashes(text, self.shingle_words)
+        signature = np.full(len(self._multipliers), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(hashes), SIGNATURE_BLOCK):
+            block = hashes[start:start + SIGNATURE_BLOCK, None]
+            np.minimum(signature, ((block * self._multipliers + self._offsets) >> np.uint64(32)).min(axis=0), out=signature)
+        return signature
+
+    def add(self, text, source=None):
+        """
+        Returns the index of the representative `text` is most similar to, if it is a
+        near-duplicate of any, or registers `text` as the next representative and returns
+        None. Representatives with the same non-None `source` are never matched.
+        """
+        self.seen += 1
+        signature = self.signature(text)
+        keys = [signature[band * self.rows:(band + 1) * self.rows].tobytes() for band in range(self.bands)]
+        candidates = sorted({rep for buckets, key in zip(self._buckets, keys) for rep in buckets.get(key, ())})
+        if source is not None:
+            candidates = [rep for rep in candidates if self._sources[rep] != source]
+        if candidates:
+            # Score every candidate; the earliest wins ties
+            agreement = (np.stack([self._signatures[rep] for rep in candidates]) == signature).mean(axis=1)
+            best = int(np.argmax(agreement))
+            if agreement[best] >= self.threshold:
+                self.duplicates += 1
+                return candidates[best]
+
+        rep = len(self._signatures)
+        self._signatures.append(signature)
+        self._sources.append(source)
+        for buckets, key in zip(self._buckets, keys):
+            buckets.setdefault(key, []).append(rep)
+        return None
+
+
+def fold_duplicates(chunks, deduplicator, representatives):
+    """
+    Appends the chunks that start a new group to `representatives` and records the metadata
+    of near-duplicates under their representative's `duplicates`. Only chunks of different
+    documents are grouped. Returns the chunks added.
+    """
+    added = []
+    for chunk in chunks:
+        rep = deduplicator.add(chunk["original_text"], source=chunk["metadata"]["document"])
+        if rep is None:
+            representatives.append(chunk)
+            added.append(chunk)
+        else:
+            representatives[rep].setdefault("duplicates", []).append(chunk["metadata"])
+    return added
@@ -0,0 +1,165 @@
+import os
+import json
+import hashlib
+import numpy as np
+
+INDEX_FILE = "index.json"
+VECTORS_FILE = "vectors.npy"
+INITIAL_CAPACITY = 1024
+
+
+def text_key(text):
+    """Returns the content hash used to key a chunk's embedding."""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def file_key(path):
+    """Returns the content hash of a file, read in blocks."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def model_identity(model_name, model_path):
+    """
+    Fingerprints a local SentenceTransformer directory so embeddings from a different
+    or updated model are never reused.
+
+    Args:
+        model_name (str): Configured model name.
+        model_path (str): Directory the model is loaded from.
+    """
+    digest = hashlib.sha256(model_name.encode('utf-8'))
+    for root, dirs, files in os.walk(model_path):
+        dirs.sort()
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, model_path).encode('utf-8'))
+            digest.update(str(os.path.getsize(path)).encode('utf-8'))
+            if name.endswith('.json'):
+                with open(path, 'rb') as f:
+                    digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+class EmbeddingStore:
+    """
+    A persistent, memory-mapped store of chunk embeddings.
+
+    Vectors live in a single `.npy` matrix opened with `np.load(mmap_mode=...)`; a small JSON
+    index maps chunk-text hashes to rows and documents to the chunk hashes they contain.
+    Rows no longer referenced by any document are recycled on the next insert.
+    """
+    def __init__(self, store_dir, model_id, dtype="float32"):
+        self.store_dir = os.path.join(store_dir, model_id)
+        self.dtype = np.dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.store_dir, exist_ok=True)
+        self._index_path = os.path.join(self.store_dir, INDEX_FILE)
+        self._vectors_path = os.path.join(self.store_dir, VECTORS_FILE)
+        self._load()
+
+    def _load(self):
+        self.rows = {}
+        self.documents = {}
+        self.free_rows = []
+        self.count = 0
+        self.vectors = None
+        if not os.path.exists(self._index_path) or not os.path.exists(self._vectors_path):
+            return
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            vectors = np.load(self._vectors_path, mmap_mode='r+')
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Warning: Embedding store at '{self.store_dir}' is unreadable ({e}). Starting empty.")
+            return
+        if vectors.dtype != self.dtype:
+            print(f"⚠️ Warning: Embedding store dtype changed to {self.dtype}. Starting empty.")
+            return
+        self.rows = index["rows"]
+        self.documents = index["documents"]
+        self.free_rows = index["free_rows"]
+        self.count = index["count"]
+        self.vectors = vectors
+
+    def _ensure_capacity(self, needed, dim):
+        capacity = 0 if self.vectors is None else self.vectors.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(INITIAL_CAPACITY, capacity * 2, needed)
+        tmp_path = self._vectors_path + ".tmp"
+        grown = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=self.dtype, shape=(new_capacity, dim))
+        if self.vectors is not None:
+            grown[:self.count] = self.vectors[:self.count]
+        grown.flush()
+        del grown
+        self.vectors = None
+        os.replace(tmp_path, self._vectors_path)
+        self.vectors = np.load(self._vectors_path, mmap_mode='r+')
+
+    def _allocate_row(self):
+        if self.free_rows:
+            return self.free_rows.pop()
+        self.count += 1
+        return self.count - 1
+
+    def get_embeddings(self, texts, encode_fn):
+        """
+        Returns a float32 matrix of embeddings for `texts`, encoding only unseen texts.
+
+        Args:
+            texts (list[str]): Texts to embed.
+            encode_fn (callable): Maps a list of texts to a 2-D float array.
+        """
+        keys = [text_key(text) for text in texts]
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+        self.misses += len(missing)
+        self.hits += len(texts) - len(missing)
+
+        if missing:
+            new_vectors = np.asarray(encode_fn(list(missing.values())), dtype=np.float32)
+            rows = [self._allocate_row() for _ in missing]
+            self._ensure_capacity(self.count, new_vectors.shape[1])
+            self.vectors[rows] = new_vectors.astype(self.dtype)
+            for key, row in zip(missing, rows):
+                self.rows[key] = row
+
+        if not keys:
+            return np.zeros((0, 0), dtype=np.float32)
+        return np.asarray(self.vectors[[self.rows[key] for key in keys]], dtype=np.float32)
+
+    def set_document(self, document, texts):
+        """Registers (or replaces) the chunk texts that make up a document."""
+        self.documents[document] = [text_key(text) for text in texts]
+
+    def remove_document(self, document):
+        """Forgets a document; rows no other document references become reusable."""
+        self.documents.pop(document, None)
+
+    def _release_unreferenced(self):
+        referenced = {key for keys in self.documents.values() for key in keys}
+        for key in [key for key in self.rows if key not in referenced]:
+            self.free_rows.append(self.rows.pop(key))
+
+    def save(self):
+        """Flushes vectors and atomically rewrites the index."""
+        self._release_unreferenced()
+        if self.vectors is not None:
+            self.vectors.flush()
+        index = {
+            "count": self.count,
+            "rows": self.rows,
+            "documents": self.documents,
+            "free_rows": self.free_rows,
+        }
+        tmp_path = self._index_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, self._index_path)
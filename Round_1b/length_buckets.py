@@ -0,0 +1,117 @@
+import numpy as np
+from utils import metrics
+
+
+def split_windows(model, texts, window_overlap):
+    """
+    Tokenizes `texts` once and, when `window_overlap` is set, splits every text longer than
+    the model's sequence limit into overlapping windows, so no part of a long section is
+    silently truncated. With `window_overlap=None` long texts stay whole and are counted at
+    the limit, because `model.encode` truncates them.
+
+    Returns (pieces, owners, lengths): the text of each piece, the index of the text it came
+    from, and its token count including special tokens.
+
+    Args:
+        model (SentenceTransformer): Model whose tokenizer and `max_seq_length` are used.
+        texts (list[str]): Texts to split.
+        window_overlap (int): Tokens shared by consecutive windows of one text, or None to
+            truncate instead of windowing.
+    """
+    tokenizer = model.tokenizer
+    special = tokenizer.num_special_tokens_to_add()
+    limit = (model.max_seq_length or tokenizer.model_max_length) - special
+    step = max(1, limit - (window_overlap or 0))
+    encoded = tokenizer(
+        list(texts), add_special_tokens=False, return_attention_mask=False, return_token_type_ids=False,
+        return_offsets_mapping=tokenizer.is_fast, verbose=False
+    )
+
+    pieces, owners, lengths = [], [], []
+    for i, text in enumerate(texts):
+        ids = encoded["input_ids"][i]
+        if len(ids) <= limit or window_overlap is None:
+            pieces.append(text)
+            owners.append(i)
+            lengths.append(min(len(ids), limit) + special)
+            continue
+        for start in range(0, len(ids), step):
+            end = min(start + limit, len(ids))
+            if tokenizer.is_fast:
+                offsets = encoded["offset_mapping"][i]
+                pieces.append(text[offsets[start][0]:offsets[end - 1][1]])
+            else:
+                pieces.append(tokenizer.decode(ids[start:end]))
+            owners.append(i)
+            lengths.append(end - start + special)
+            if end == len(ids):
+                break
+    return pieces, np.asarray(owners, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+
+
+def token_budget_batches(lengths, token_budget, max_batch):
+    """
+    Groups piece indices, longest first, into batches whose padded size (batch size times
+    its longest piece) stays within `token_budget` tokens.
+    """
+    order = np.argsort(-np.asarray(lengths), kind='stable')
+    batches, batch = [], []
+    for i in order:
+        # Pieces arrive longest first, so the batch's first piece sets its padded length
+        if batch and ((len(batch) + 1) * lengths[batch[0]] > token_budget or len(batch) >= max_batch):
+            batches.append(batch)
+            batch = []
+        batch.append(int(i))
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def encode_length_bucketed(model, texts, token_budget, max_batch, window_overlap, device=None, show_progress=False):
+    """
+    Encodes `texts` in length-sorted, token-budgeted batches and returns a float32 matrix in
+    the original order. With `window_overlap` set, texts over the model limit are embedded
+    window by window and pooled back into one vector (token-weighted mean, rescaled to the
+    windows' mean norm); otherwise they are truncated, exactly as `model.encode` does.
+
+    Args:
+        model (SentenceTransformer): Model used for encoding.
+        texts (list[str]): Texts to embed.
+        token_budget (int): Maximum padded tokens per batch.
+        max_batch (int): Maximum texts per batch, however short they are.
+        window_overlap (int): Tokens shared by consecutive windows of a long text, or None
+            to truncate long texts.
+        device (str): Device passed through to `model.encode`.
+        show_progress (bool): Print a one-line summary of the batching plan.
+    """
+    dim = model.get_sentence_embedding_dimension()
+    if not texts:
+        return np.zeros((0, dim), dtype=np.float32)
+
+    with metrics.timer("round1b.tokenize"):
+        pieces, owners, lengths = split_windows(model, texts, window_overlap)
+    metrics.count("round1b.windows", len(pieces))
+    metrics.count("round1b.tokens_encoded", int(lengths.sum()))
+    batches = token_budget_batches(lengths, token_budget, max_batch)
+    if show_progress:
+        print(f"🧮 Encoding {len(texts)} texts as {len(pieces)} pieces in {len(batches)} length-bucketed batches "
+              f"({int(lengths.sum())} tokens)...")
+
+    piece_vectors = np.empty((len(pieces), dim), dtype=np.float32)
+    with metrics.timer("round1b.forward"):
+        for batch in batches:
+            piece_vectors[batch] = model.encode(
+                [pieces[i] for i in batch], batch_size=len(batch), convert_to_numpy=True,
+                show_progress_bar=False, device=device
+            )
+    if len(pieces) == len(texts):
+        return piece_vectors
+
+    weights = lengths.astype(np.float32)
+    pooled = np.zeros((len(texts), dim), dtype=np.float32)
+    np.add.at(pooled, owners, piece_vectors * weights[:, None])
+    pooled /= np.bincount(owners, weights=weights, minlength=len(texts))[:, None].astype(np.float32)
+    window_norms = np.bincount(owners, weights=np.linalg.norm(piece_vectors, axis=1), minlength=len(texts))
+    mean_norms = window_norms / np.bincount(owners, minlength=len(texts))
+    pooled *= (mean_norms / np.maximum(np.linalg.norm(pooled, axis=1), 1e-12))[:, None].astype(np.float32)
+    return pooled
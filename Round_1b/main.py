@@ -1,50 +1,66 @@
 import os
+import sys
 import json
 from datetime import datetime
 import time
-from retrieval import DocumentRetriever
+import fitz  # PyMuPDF
+from retrieval import DocumentRetriever, ModelLoadError
 from config import (
     INPUT_DIR,
     OUTPUT_DIR,
     PERSONA,
     JOB_TO_BE_DONE,
     TOP_K_SECTIONS,
-    TOP_K_SUBSECTIONS
+    TOP_K_SUBSECTIONS,
+    OVERLAP_MODEL_LOAD,
+    METRICS_REPORT
 )
-from utils import save_json
-
-def run_analysis_pipeline():
-    """
-    Main function to execute the persona-driven document intelligence pipeline.
-    """
-    start_time = time.time()
-    print("🚀 Starting Advanced Document Intelligence Pipeline...")
+from utils import save_json, peak_rss_mb, metrics, ROUND_1A_DIR
 
+def _init_retriever(background_load=OVERLAP_MODEL_LOAD):
     try:
-        retriever = DocumentRetriever()
-        print(f"✅ Retriever initialized successfully on device: {retriever.device}")
+        retriever = DocumentRetriever(background_load=background_load)
+        if background_load:
+            print("🧠 Loading model in the background while documents are parsed...")
+        else:
+            print(f"✅ Retriever initialized successfully on device: {retriever.device}")
+        return retriever
     except Exception as e:
-        print(f"🔥 Fatal Error: Could not initialize DocumentRetriever. {e}")
-        return
+        _report_init_error(e)
+        return None
+
+def _report_init_error(e):
+    print(f"🔥 Fatal Error: Could not initialize DocumentRetriever. {e}")
 
+def _list_pdfs(input_dir):
     try:
-        pdf_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith('.pdf')]
+        pdf_files = [f for f in os.listdir(input_dir) if f.lower().endswith('.pdf')]
         if not pdf_files:
-            print(f"⚠️ Warning: No PDF files found in '{INPUT_DIR}'. Exiting.")
-            return
+            print(f"⚠️ Warning: No PDF files found in '{input_dir}'. Exiting.")
+            return None
         print(f"📂 Found {len(pdf_files)} documents for analysis: {pdf_files}")
+        return pdf_files
     except FileNotFoundError:
-        print(f"🔥 Fatal Error: Input directory '{INPUT_DIR}' not found.")
-        return
+        print(f"🔥 Fatal Error: Input directory '{input_dir}' not found.")
+        return None
 
-    analysis_result = retriever.process_collection(
-        pdf_files=pdf_files,
-        persona=PERSONA,
-        job_to_be_done=JOB_TO_BE_DONE,
-        top_k_sections=TOP_K_SECTIONS,
-        top_k_subsections=TOP_K_SUBSECTIONS
-    )
+def _report_phases(retriever, start_time, phases):
+    """Prints per-phase timestamps relative to pipeline start, including how much model load was hidden."""
+    timings = retriever.timings
+    if 'model_ready' in timings:
+        phases = dict(phases, model_ready=timings['model_ready'])
+    for name, timestamp in sorted(phases.items(), key=lambda item: item[1]):
+        print(f"⏱️ +{timestamp - start_time:.2f}s {name}")
+    if 'model_ready' in timings:
+        load_time = timings['model_ready'] - timings['model_load_start']
+        waited = timings.get('model_wait', load_time if retriever._model_thread is None else 0.0)
+        print(f"⏱️ Model load {load_time:.2f}s: {max(load_time - waited, 0.0):.2f}s hidden, {waited:.2f}s waited")
+    print(f"📈 Peak RSS: {peak_rss_mb():.0f} MB")
+    if METRICS_REPORT:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        print(f"📊 Stage metrics saved to: {metrics.METRICS.write_report(os.path.join(OUTPUT_DIR, METRICS_REPORT))}")
 
+def _save_and_report(analysis_result, pdf_files, start_time):
     output_filename = f"advanced_analysis_output.json"
     output_path = os.path.join(OUTPUT_DIR, output_filename)
     
@@ -65,6 +81,242 @@ def run_analysis_pipeline():
     print(f"💾 Output saved to: {output_path}")
     print("="*50)
 
+def run_analysis_pipeline(pdf_files=None, retriever=None):
+    """
+    Main function to execute the persona-driven document intelligence pipeline.
+    Analyzes every PDF in INPUT_DIR unless `pdf_files` names a subset.
+    """
+    start_time = time.time()
+    print("🚀 Starting Advanced Document Intelligence Pipeline...")
+
+    retriever = retriever or _init_retriever()
+    if retriever is None:
+        return
+
+    pdf_files = pdf_files or _list_pdfs(INPUT_DIR)
+    if not pdf_files:
+        return
+
+    try:
+        analysis_result = retriever.process_collection(
+            pdf_files=pdf_files,
+            persona=PERSONA,
+            job_to_be_done=JOB_TO_BE_DONE,
+            top_k_sections=TOP_K_SECTIONS,
+            top_k_subsections=TOP_K_SUBSECTIONS
+        )
+    except ModelLoadError as e:
+        _report_init_error(e)
+        return
+
+    _report_phases(retriever, start_time, {"analysis_done": time.time()})
+    _save_and_report(analysis_result, pdf_files, start_time)
+
+def run_streaming_pipeline():
+    """
+    Executes the pipeline with parsing and embedding overlapped: parser worker processes
+    chunk documents into a bounded queue while the encoder consumes them in full batches.
+    """
+    start_time = time.time()
+    print("🚀 Starting Streaming Document Intelligence Pipeline...")
+
+    retriever = _init_retriever()
+    if retriever is None:
+        return
+
+    pdf_files = _list_pdfs(INPUT_DIR)
+    if not pdf_files:
+        return
+
+    try:
+        corpus = retriever.build_corpus_streaming(pdf_files)
+        corpus_done = time.time()
+        analysis_result = retriever.answer_query(
+            corpus,
+            persona=PERSONA,
+            job_to_be_done=JOB_TO_BE_DONE,
+            top_k_sections=TOP_K_SECTIONS,
+            top_k_subsections=TOP_K_SUBSECTIONS
+        )
+    except ModelLoadError as e:
+        _report_init_error(e)
+        return
+
+    _report_phases(retriever, start_time, {"corpus_embedded": corpus_done, "analysis_done": time.time()})
+    _save_and_report(analysis_result, pdf_files, start_time)
+
+def load_queries(queries_path):
+    """
+    Reads persona/job pairs from a JSON array or a JSON-lines file of objects with
+    `persona`, `job_to_be_done` and an optional `id`.
+    """
+    with open(queries_path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    if content.startswith('['):
+        return json.loads(content)
+    return [json.loads(line) for line in content.splitlines() if line.strip()]
+
+def _batch_output_name(query, index):
+    query_id = str(query.get("id", f"{index + 1:03d}"))
+    query_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in query_id)
+    return f"advanced_analysis_output_{query_id}.json"
+
+def run_batch_pipeline(queries_path, fused=False):
+    """
+    Answers every persona/job pair in `queries_path` against one collection, chunking and
+    embedding the documents once and encoding all HyDE queries in a single batch.
+    """
+    start_time = time.time()
+    print("🚀 Starting Batch Document Intelligence Pipeline...")
+
+    queries = load_queries(queries_path)
+    print(f"📋 Loaded {len(queries)} persona/job queries from '{queries_path}'")
+
+    retriever = _init_retriever()
+    if retriever is None:
+        return
+
+    pdf_files = _list_pdfs(INPUT_DIR)
+    if not pdf_files:
+        return
+
+    chunk_fn, outline_version = None, None
+    if fused:
+        process = import_round_1a()
+        chunk_fn = lambda: extract_fused_chunks(retriever, process, INPUT_DIR, pdf_files)
+        outline_version = process.heuristic_version()
+    corpus = retriever.build_corpus(pdf_files, chunk_fn, outline_version, defer=True)
+    try:
+        results = retriever.answer_queries(
+            corpus,
+            [(query["persona"], query["job_to_be_done"]) for query in queries],
+            top_k_sections=TOP_K_SECTIONS,
+            top_k_subsections=TOP_K_SUBSECTIONS
+        )
+    except ModelLoadError as e:
+        _report_init_error(e)
+        return
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for index, (query, analysis_result) in enumerate(zip(queries, results)):
+        save_json(analysis_result, os.path.join(OUTPUT_DIR, _batch_output_name(query, index)))
+
+    _report_phases(retriever, start_time, {"analysis_done": time.time()})
+    print("\n" + "="*50)
+    print("✅ BATCH PIPELINE COMPLETED")
+    print(f"⏰ Total Processing Time: {time.time() - start_time:.2f} seconds")
+    print(f"▶️ Input Documents: {len(pdf_files)}")
+    print(f"▶️ Queries Answered: {len(results)}")
+    print(f"💾 Outputs saved to: {OUTPUT_DIR}/advanced_analysis_output_<id>.json")
+    print("="*50)
+
+def run_profiled_pipeline(pdf_file):
+    """
+    Runs the standard pipeline on a single document under cProfile and tracemalloc, writing
+    profile_<name>.prof, profile_<name>_cpu.txt and profile_<name>_memory.txt to OUTPUT_DIR.
+    The model is loaded before profiling starts, so the profile covers the document only.
+    """
+    retriever = _init_retriever(background_load=False)
+    if retriever is None:
+        return
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    filename = os.path.basename(pdf_file)
+    output_prefix = os.path.join(OUTPUT_DIR, "profile_" + os.path.splitext(filename)[0])
+    with metrics.profile_capture(output_prefix):
+        run_analysis_pipeline(pdf_files=[filename], retriever=retriever)
+    print(f"🔎 Profile saved to: {output_prefix}.prof ({output_prefix}_cpu.txt, {output_prefix}_memory.txt)")
+
+def import_round_1a():
+    """Imports Round 1a's `process` module, falling back to the sibling source directory."""
+    try:
+        import process
+    except ImportError:
+        sys.path.insert(0, os.path.abspath(ROUND_1A_DIR))
+        import process
+    return process
+
+def extract_fused_chunks(retriever, process, input_dir, pdf_files, outline_dir=None):
+    """
+    Runs Round 1a outline extraction and Round 1b chunking on each PDF while it is open,
+    so every document is opened once and its outline never has to round-trip through JSON.
+    Text is still extracted twice: Round 1a's span layout does not give the chunker the
+    `get_text(clip=...)` text it must reproduce.
+    """
+    all_chunks = []
+    for filename in pdf_files:
+        filepath = os.path.join(input_dir, filename)
+        try:
+            doc = fitz.open(filepath)
+        except Exception as e:
+            print(f"⚠️ Warning: Could not open {filename}. Skipping. {e}")
+            continue
+        try:
+            layout = process.extract_doc_layout(doc)
+            outline_data = process.extract_outline(filepath, layout=layout)
+            if outline_dir:
+                process.write_outline(outline_data, outline_dir, filename)
+            all_chunks.extend(retriever._extract_sections_from_outline(filepath, filename, outline_data, doc=doc))
+        except Exception as e:
+            print(f"⚠️ Warning: Could not process {filename}. Skipping. {e}")
+        finally:
+            doc.close()
+    return all_chunks
+
+def run_fused_pipeline(input_dir=INPUT_DIR, outline_dir=None):
+    """
+    Executes Round 1a and Round 1b in one process without the intermediate JSON round trip.
+    Pass `outline_dir` to still write the Round 1a outline files; on a result-cache hit no
+    document is parsed, so none are written.
+    """
+    start_time = time.time()
+    print("🚀 Starting Fused Outline + Document Intelligence Pipeline...")
+
+    retriever = _init_retriever()
+    if retriever is None:
+        return
+
+    pdf_files = _list_pdfs(input_dir)
+    if not pdf_files:
+        return
+
+    process = import_round_1a()
+    if outline_dir:
+        os.makedirs(outline_dir, exist_ok=True)
+    phases = {}
+
+    def chunk_documents():
+        all_chunks = extract_fused_chunks(retriever, process, input_dir, pdf_files, outline_dir)
+        phases["parsing_done"] = time.time()
+        return all_chunks
+
+    try:
+        analysis_result = retriever.process_collection(
+            pdf_files=pdf_files,
+            persona=PERSONA,
+            job_to_be_done=JOB_TO_BE_DONE,
+            top_k_sections=TOP_K_SECTIONS,
+            top_k_subsections=TOP_K_SUBSECTIONS,
+            chunk_fn=chunk_documents,
+            outline_version=process.heuristic_version(),
+            input_dir=input_dir
+        )
+    except ModelLoadError as e:
+        _report_init_error(e)
+        return
+
+    phases["analysis_done"] = time.time()
+    _report_phases(retriever, start_time, phases)
+    _save_and_report(analysis_result, pdf_files, start_time)
+
 
 if __name__ == "__main__":
-    run_analysis_pipeline()
\ No newline at end of file
+    if "--batch" in sys.argv:
+        run_batch_pipeline(sys.argv[sys.argv.index("--batch") + 1], fused="--fused" in sys.argv)
+    elif "--fused" in sys.argv:
+        run_fused_pipeline()
+    elif "--stream" in sys.argv:
+        run_streaming_pipeline()
+    elif "--profile" in sys.argv:
+        run_profiled_pipeline(sys.argv[sys.argv.index("--profile") + 1])
+    else:
+        run_analysis_pipeline()
\ No newline at end of file
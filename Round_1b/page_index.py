@@ -0,0 +1,60 @@
+import fitz  # PyMuPDF
+
+
+class DocumentPageIndex:
+    """
+    A per-document text cache used for outline-based chunking.
+
+    Sections of a document share most of their pages: the H0 title chunk and every
+    higher-level section cover the pages of the sections nested in them. Each page is
+    therefore extracted once as a whole and each band between two heading boundaries once,
+    instead of once per section that spans it. Bands still come from
+    `page.get_text(clip=...)`, because MuPDF keeps or drops characters at a clip edge by
+    their glyph outlines, which the extracted text does not expose, and chunk text must not
+    change. Heading positions are located with one search TextPage per page, shared by
+    every heading on that page.
+    """
+    def __init__(self, doc):
+        self.doc = doc
+        self.page_sizes = [(page.rect.width, page.rect.height) for page in doc]
+        self._bands = {}
+        self._heading_rects = {}
+
+    def __len__(self):
+        return len(self.page_sizes)
+
+    def locate_headings(self, headings):
+        """Finds the first occurrence of every heading on its page in a single sweep over the pages."""
+        texts_by_page = {}
+        for heading in headings:
+            texts_by_page.setdefault(heading["page"], set()).add(heading["text"])
+
+        for page_number in sorted(texts_by_page):
+            if not 1 <= page_number <= len(self):
+                continue
+            page = self.doc.load_page(page_number - 1)
+            textpage = page.get_textpage(flags=fitz.TEXTFLAGS_SEARCH)
+            for text in texts_by_page[page_number]:
+                results = page.search_for(text, textpage=textpage)
+                self._heading_rects[(page_number, text)] = results[0] if results else None
+
+    def heading_rect(self, page_number, text):
+        key = (page_number, text)
+        if key not in self._heading_rects:
+            results = self.doc.load_page(page_number - 1).search_for(text)
+            self._heading_rects[key] = results[0] if results else None
+        return self._heading_rects[key]
+
+    def page_height(self, page_number):
+        return self.page_sizes[page_number - 1][1]
+
+    def extract(self, page_number, y0=None, y1=None):
+        """Returns `page.get_text(clip=...)` for the band y0..y1 of a page, extracting each band once."""
+        width, height = self.page_sizes[page_number - 1]
+        y0 = 0 if y0 is None else y0
+        y1 = height if y1 is None else y1
+        key = (page_number, y0, y1)
+        if key not in self._bands:
+            page = self.doc.load_page(page_number - 1)
+            self._bands[key] = page.get_text(clip=fitz.Rect(0, y0, width, y1))
+        return self._bands[key]
@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+from collections import OrderedDict
+from embedding_store import text_key
+
+
+class QueryEmbeddingCache:
+    """An in-memory LRU of query embeddings keyed by the HyDE text they were encoded from."""
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_embeddings(self, texts, encode_fn):
+        """
+        Returns one embedding per text, encoding only texts not in the cache.
+
+        Args:
+            texts (list[str]): HyDE texts to embed.
+            encode_fn (callable): Maps a list of texts to a sequence of embeddings.
+        """
+        with self._lock:
+            missing = [text for text in dict.fromkeys(texts) if text not in self._entries]
+            self.misses += len(missing)
+            self.hits += len(texts) - len(missing)
+            if missing:
+                self._entries.update(zip(missing, encode_fn(missing)))
+            vectors = []
+            for text in texts:
+                self._entries.move_to_end(text)
+                vectors.append(self._entries[text])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            return vectors
+
+
+class ResultCache:
+    """
+    A persisted cache of analysis results, one JSON file per key, bounded to `max_entries`
+    files. Hits refresh a file's modification time and the least recently used files are
+    evicted first; other processes may share the directory.
+    """
+    def __init__(self, cache_dir, max_entries):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        files = [name for name in os.listdir(cache_dir) if name.endswith(".json")]
+        files.sort(key=lambda name: os.path.getmtime(os.path.join(cache_dir, name)))
+        self._order = OrderedDict((name[:-len(".json")], None) for name in files)
+
+    @staticmethod
+    def make_key(*parts):
+        """Hashes JSON-serializable key parts into a cache key."""
+        return text_key(json.dumps(parts, ensure_ascii=False))
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + ".json")
+
+    def get(self, key):
+        """Returns a fresh copy of the cached result for `key`, or None."""
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            os.utime(self._path(key))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                self._order.pop(key, None)
+            return None
+        with self._lock:
+            self.hits += 1
+            self._order[key] = None
+            self._order.move_to_end(key)
+        return result
+
+    def put(self, key, result):
+        """Atomically writes `result` under `key`, evicting the least recently used entries."""
+        tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False)
+        os.replace(tmp_path, self._path(key))
+        with self._lock:
+            self._order[key] = None
+            self._order.move_to_end(key)
+            evicted = []
+            while len(self._order) > self.max_entries:
+                evicted.append(self._order.popitem(last=False)[0])
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
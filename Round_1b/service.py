@@ -0,0 +1,129 @@
+"""
+Resident retrieval service.
+
+Loads the embedding model and the corpus embeddings once, then answers any number of
+persona/job requests over a JSON-lines protocol on stdin/stdout:
+
+    {"id": 1, "persona": "Travel Planner", "job_to_be_done": "Plan a trip of 4 days ..."}
+
+Each response line has the same schema as `advanced_analysis_output.json`; a request `id`
+is echoed as `metadata.request_id`. Failed requests are answered with `{"error": ...}`.
+Progress messages go to stderr, so stdout carries nothing but responses.
+
+    python service.py [--fused]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from retrieval import DocumentRetriever, ModelLoadError
+from config import INPUT_DIR, TOP_K_SECTIONS, TOP_K_SUBSECTIONS, OVERLAP_MODEL_LOAD
+
+
+class RetrievalService:
+    """
+    Answers persona/job requests against a corpus that stays in memory.
+    Requests are read and written on the asyncio event loop; all model work runs on a
+    single encoder thread, so queries never contend for torch.
+    """
+    def __init__(self, retriever, corpus):
+        self.retriever = retriever
+        self.corpus = corpus
+        self.encoder = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encoder")
+
+    def answer(self, request):
+        start_time = time.perf_counter()
+        result = self.retriever.answer_query(
+            self.corpus,
+            request["persona"],
+            request["job_to_be_done"],
+            request.get("top_k_sections", TOP_K_SECTIONS),
+            request.get("top_k_subsections", TOP_K_SUBSECTIONS),
+        )
+        if result and "id" in request:
+            result["metadata"]["request_id"] = request["id"]
+        print(f"⏱️ Request {request.get('id', '-')} answered in {(time.perf_counter() - start_time) * 1000:.1f} ms")
+        return result
+
+    async def handle_line(self, line, write):
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            missing = [key for key in ("persona", "job_to_be_done") if key not in request]
+            if missing:
+                raise ValueError(f"missing {', '.join(missing)}")
+        except ValueError as e:
+            response = {"error": f"Invalid request: {e}"}
+            if isinstance(request, dict) and "id" in request:
+                response["id"] = request["id"]
+            write(response)
+            return
+
+        loop = asyncio.get_running_loop()
+        try:
+            response = await loop.run_in_executor(self.encoder, self.answer, request)
+        except Exception as e:
+            response = {"error": str(e)}
+            if "id" in request:
+                response["id"] = request["id"]
+        write(response)
+
+    async def serve_stdio(self, output):
+        def write(response):
+            output.write(json.dumps(response, ensure_ascii=False) + "\n")
+            output.flush()
+
+        loop = asyncio.get_running_loop()
+        pending = set()
+        while True:
+            line = await loop.run_in_executor(None, sys.stdin.readline)
+            if not line:
+                break
+            if not line.strip():
+                continue
+            task = asyncio.create_task(self.handle_line(line, write))
+            pending.add(task)
+            task.add_done_callback(pending.discard)
+        if pending:
+            await asyncio.gather(*pending)
+        self.encoder.shutdown()
+
+
+def load_corpus(retriever, fused=False):
+    pdf_files = [f for f in os.listdir(INPUT_DIR) if f.lower().endswith('.pdf')]
+    chunk_fn, outline_version = None, None
+    if fused:
+        from main import import_round_1a, extract_fused_chunks
+        process = import_round_1a()
+        chunk_fn = lambda: extract_fused_chunks(retriever, process, INPUT_DIR, pdf_files)
+        outline_version = process.heuristic_version()
+    return retriever.build_corpus(pdf_files, chunk_fn, outline_version)
+
+
+def main():
+    protocol_output = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        start_time = time.time()
+        try:
+            retriever = DocumentRetriever(background_load=OVERLAP_MODEL_LOAD)
+            retriever.show_progress = False
+            corpus = load_corpus(retriever, fused="--fused" in sys.argv)
+            retriever.wait_for_model()
+        except (OSError, ModelLoadError) as e:
+            print(f"🔥 Fatal Error: Could not initialize DocumentRetriever. {e}")
+            sys.exit(1)
+        if corpus is None:
+            print(f"⚠️ Warning: No chunks could be built from '{INPUT_DIR}'. Requests will return empty results.")
+        else:
+            print(f"✅ Service ready in {time.time() - start_time:.2f}s: "
+                  f"{len(corpus['chunks'])} chunks from {len(corpus['pdf_files'])} documents.")
+        asyncio.run(RetrievalService(retriever, corpus).serve_stdio(protocol_output))
+
+
+if __name__ == "__main__":
+    main()
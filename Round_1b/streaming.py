@@ -0,0 +1,177 @@
+import os
+import queue
+import tempfile
+import threading
+import multiprocessing
+from collections import deque
+from itertools import islice
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from embedding_store import text_key
+from utils import metrics, peak_rss_mb
+from dedup import fold_duplicates
+
+SPOOLED_FIELDS = ("text", "original_text")
+INITIAL_ROWS = 1024
+
+
+class SpooledChunk(dict):
+    """A chunk dict whose `text` and `original_text` are read back from its spool on access."""
+    def __init__(self, spool, offsets, **fields):
+        super().__init__(**fields)
+        self._spool = spool
+        self._offsets = offsets
+
+    def __missing__(self, key):
+        if key in self._offsets:
+            return self._spool.read(*self._offsets[key])
+        raise KeyError(key)
+
+
+class ChunkSpool:
+    """
+    An append-only temporary file of chunk texts. Spooled chunks keep only their metadata,
+    text hash and file offsets in memory; the file is removed once no chunk refers to it.
+    """
+    def __init__(self, directory=None):
+        self._file = tempfile.TemporaryFile(dir=directory)
+        self._lock = threading.Lock()
+
+    def add(self, chunk):
+        offsets = {}
+        with self._lock:
+            self._file.seek(0, os.SEEK_END)
+            for field in SPOOLED_FIELDS:
+                data = chunk[field].encode('utf-8')
+                offsets[field] = (self._file.tell(), len(data))
+                self._file.write(data)
+        return SpooledChunk(self, offsets, metadata=chunk["metadata"], text_key=text_key(chunk["text"]))
+
+    def read(self, offset, length):
+        with self._lock:
+            self._file.seek(offset)
+            return self._file.read(length).decode('utf-8')
+
+
+class _SpoolingList:
+    """List facade for fold_duplicates that spools chunks as they are appended to `chunks`."""
+    def __init__(self, chunks, spool):
+        self._chunks = chunks
+        self._spool = spool
+
+    def append(self, chunk):
+        self._chunks.append(self._spool.add(chunk))
+
+    def __getitem__(self, index):
+        return self._chunks[index]
+
+
+def _chunk_in_worker(chunk_fn, filename):
+    chunks = chunk_fn(filename)
+    return chunks, peak_rss_mb(), metrics.METRICS.drain()
+
+
+def _produce_documents(pdf_files, chunk_fn, workers, documents, errors, stats):
+    """
+    Feeder thread: keeps `workers` documents in flight on a process pool and puts each
+    document's (filename, chunks) on the bounded `documents` queue in input order. A full
+    queue blocks the feeder, so parsing never runs more than a few documents ahead.
+    """
+    try:
+        # Spawned, not forked: the model may be loading on another thread of this process
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            files = iter(pdf_files)
+            in_flight = deque((filename, pool.submit(_chunk_in_worker, chunk_fn, filename))
+                              for filename in islice(files, workers))
+            while in_flight:
+                filename, future = in_flight.popleft()
+                for next_file in islice(files, 1):
+                    in_flight.append((next_file, pool.submit(_chunk_in_worker, chunk_fn, next_file)))
+                try:
+                    chunks, worker_rss, worker_metrics = future.result()
+                    stats["worker_peak_rss_mb"] = max(stats.get("worker_peak_rss_mb", 0.0), worker_rss)
+                    metrics.METRICS.merge(worker_metrics)
+                except Exception as e:
+                    print(f"⚠️ Warning: Could not process {filename}. Skipping. {e}")
+                    chunks = []
+                documents.put((filename, chunks))
+    except Exception as e:
+        errors.append(e)
+    finally:
+        documents.put(None)
+
+
+def stream_chunk_embeddings(pdf_files, chunk_fn, vectors_fn, store=None, workers=2, queue_documents=4,
+                            batch_size=256, spool_dir=None, stats=None, deduplicator=None):
+    """
+    Chunks documents in parser worker processes while the calling thread embeds them.
+
+    Chunks arrive per document through a bounded queue; their texts are collected into full
+    batches of `batch_size`, encoded, and the vectors appended to a preallocated matrix that
+    doubles when full. Chunk texts are spooled to disk as soon as they are queued for
+    encoding. Returns (chunks, embeddings) in the same order as chunking the documents
+    one after another.
+
+    Parser-worker peak RSS (MB) is recorded in `stats` when a dict is passed, and the stage
+    metrics the workers collect are merged into this process's `metrics.METRICS`.
+
+    Args:
+        pdf_files (list[str]): Documents to chunk, in order.
+        chunk_fn (callable): Picklable function mapping a filename to its list of chunks.
+        vectors_fn (callable): Maps a list of texts to a float32 matrix of embeddings.
+        store (EmbeddingStore): Store that records which chunks each document holds.
+        workers (int): Parser worker processes.
+        queue_documents (int): Parsed documents that may wait for the encoder.
+        batch_size (int): Texts per encoder batch.
+        spool_dir (str): Directory for the chunk-text spool file (system temp if None).
+        stats (dict): Receives streaming statistics.
+        deduplicator (MinHashDeduplicator): Folds near-duplicate chunks before they are encoded.
+    """
+    stats = {} if stats is None else stats
+    documents = queue.Queue(maxsize=queue_documents)
+    errors = []
+    feeder = threading.Thread(target=_produce_documents, args=(pdf_files, chunk_fn, workers, documents, errors, stats),
+                              name="chunk-feeder", daemon=True)
+    feeder.start()
+
+    spool = ChunkSpool(spool_dir)
+    chunks, pending = [], []
+    embeddings, rows = None, 0
+
+    def encode(texts):
+        nonlocal embeddings, rows
+        vectors = vectors_fn(texts)
+        if embeddings is None:
+            embeddings = np.empty((max(INITIAL_ROWS, len(vectors)), vectors.shape[1]), dtype=np.float32)
+        if rows + len(vectors) > len(embeddings):
+            grown = np.empty((max(2 * len(embeddings), rows + len(vectors)), embeddings.shape[1]), dtype=np.float32)
+            grown[:rows] = embeddings[:rows]
+            embeddings = grown
+        embeddings[rows:rows + len(vectors)] = vectors
+        rows += len(vectors)
+
+    while True:
+        item = documents.get()
+        if item is None:
+            break
+        filename, doc_chunks = item
+        if deduplicator is not None:
+            doc_chunks = fold_duplicates(doc_chunks, deduplicator, _SpoolingList(chunks, spool))
+        else:
+            chunks.extend(spool.add(chunk) for chunk in doc_chunks)
+        texts = [chunk['text'] for chunk in doc_chunks]
+        if store is not None:
+            store.set_document(filename, texts)
+        pending.extend(texts)
+        del item, doc_chunks, texts
+        while len(pending) >= batch_size:
+            encode(pending[:batch_size])
+            del pending[:batch_size]
+    feeder.join()
+    if errors:
+        raise errors[0]
+    if pending:
+        encode(pending)
+    if embeddings is None:
+        return chunks, np.zeros((0, 0), dtype=np.float32)
+    return chunks, embeddings[:rows]
@@ -0,0 +1,145 @@
+"""
+Reproducible synthetic PDF collections for benchmarks, with known outlines.
+
+Every document has a centered title, numbered H1/H2/H3 headings in bold at decreasing sizes,
+body paragraphs, and decoys a heading detector should ignore (bold body-size notes,
+page-number footers). The generated outline is returned in Round 1a's JSON format, so it
+doubles as the ground truth for outline accuracy.
+
+    python synthetic_corpus.py OUTPUT_DIR [--documents 5] [--pages 20] [--seed 0]
+"""
+import os
+import sys
+import json
+import random
+import fitz  # PyMuPDF
+
+WORDS = ("travel plan food hotel city beach museum trip friends budget night market harbour castle "
+         "festival coast wine route train walk lunch dinner tour gallery garden river bridge square").split()
+TITLE_SIZE = 24
+HEADING_SIZES = {"H1": 18, "H2": 15, "H3": 13}
+BODY_SIZE = 10
+HEADING_FONT = "hebo"   # Helvetica Bold
+BODY_FONT = "helv"
+MARGIN = 72
+PARAGRAPH_HEIGHT = 64
+
+
+def _sentence(rng, n_words):
+    words = [rng.choice(WORDS) for _ in range(n_words)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng):
+    return " ".join(_sentence(rng, rng.randint(8, 16)) for _ in range(rng.randint(2, 4)))
+
+
+def _next_level(rng, counters):
+    """Picks the next heading level so the hierarchy stays well formed (no H3 before an H2)."""
+    if counters[0] == 0 or rng.random() < 0.3:
+        return 0
+    if counters[1] == 0 or rng.random() < 0.6:
+        return 1
+    return 2
+
+
+def generate_document(path, pages, seed=0, headings_per_page=2):
+    """
+    Writes a synthetic PDF to `path` and returns its outline ({"title", "outline"}).
+
+    Args:
+        path (str): Output PDF path.
+        pages (int): Number of pages.
+        seed (int): Seed for the text and structure; equal seeds give identical PDFs.
+        headings_per_page (int): Average number of headings per page.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    title = f"{rng.choice(WORDS).capitalize()} {rng.choice(WORDS).capitalize()} Field Guide {seed}"
+    outline = []
+    counters = [0, 0, 0]
+    heading_probability = headings_per_page / 5.0
+
+    for page_number in range(1, pages + 1):
+        page = doc.new_page()
+        width, height = page.rect.width, page.rect.height
+        y = MARGIN
+        if page_number == 1:
+            title_width = fitz.get_text_length(title, fontname=HEADING_FONT, fontsize=TITLE_SIZE)
+            page.insert_text(((width - title_width) / 2, y + TITLE_SIZE), title, fontsize=TITLE_SIZE, fontname=HEADING_FONT)
+            y += TITLE_SIZE + 30
+
+        while y + PARAGRAPH_HEIGHT + 40 < height - MARGIN:
+            if rng.random() < heading_probability:
+                depth = _next_level(rng, counters)
+                counters[depth] += 1
+                counters[depth + 1:] = [0] * (len(counters) - depth - 1)
+                level = f"H{depth + 1}"
+                number = ".".join(str(c) for c in counters[:depth + 1])
+                text = f"{number} {' '.join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 4)))}"
+                size = HEADING_SIZES[level]
+                page.insert_text((MARGIN, y + size), text, fontsize=size, fontname=HEADING_FONT)
+                outline.append({"level": level, "text": text, "page": page_number})
+                y += size + 16
+            elif rng.random() < 0.1:
+                # Decoy: a bold label at body size is emphasis, not a heading
+                page.insert_text((MARGIN, y + BODY_SIZE), f"Note: {_sentence(rng, 5)}", fontsize=BODY_SIZE, fontname=HEADING_FONT)
+                y += BODY_SIZE + 14
+            page.insert_textbox(fitz.Rect(MARGIN, y, width - MARGIN, y + PARAGRAPH_HEIGHT), _paragraph(rng),
+                                fontsize=BODY_SIZE, fontname=BODY_FONT)
+            y += PARAGRAPH_HEIGHT + 8
+
+        footer = str(page_number)
+        footer_width = fitz.get_text_length(footer, fontname=BODY_FONT, fontsize=9)
+        page.insert_text(((width - footer_width) / 2, height - 40), footer, fontsize=9, fontname=BODY_FONT)
+
+    # Fixed metadata and file ID keep equal seeds byte-identical
+    doc.set_metadata({"title": title, "producer": "synthetic_corpus", "creationDate": "D:20240101000000", "modDate": "D:20240101000000"})
+    doc.save(path, no_new_id=True)
+    doc.close()
+    return {"title": title, "outline": outline}
+
+
+def generate_corpus(output_dir, documents, pages, seed=0):
+    """
+    Writes `documents` PDFs of `pages` pages to `output_dir` and returns
+    {filename: expected outline}. The same arguments always produce the same collection.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    expected = {}
+    for i in range(documents):
+        filename = f"synthetic_{seed}_{i:03d}.pdf"
+        expected[filename] = generate_document(os.path.join(output_dir, filename), pages, seed=seed * 100003 + i)
+    return expected
+
+
+def outline_accuracy(expected, predicted):
+    """
+    Scores a predicted outline against the generated one: headings match on (text, page);
+    returns precision, recall, F1, level accuracy over matched headings and title match.
+    """
+    truth = {(h["text"].strip(), h["page"]): h["level"] for h in expected["outline"]}
+    found = {(h["text"].strip(), h["page"]): h["level"] for h in predicted["outline"]}
+    matched = truth.keys() & found.keys()
+    precision = len(matched) / len(found) if found else 0.0
+    recall = len(matched) / len(truth) if truth else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        "precision": precision,
+        "recall": recall,
+        "f1": f1,
+        "level_accuracy": sum(truth[k] == found[k] for k in matched) / len(matched) if matched else 0.0,
+        "title_match": predicted.get("title", "").strip() == expected["title"],
+    }
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+    options = {name: int(args[args.index(name) + 1]) for name in ("--documents", "--pages", "--seed") if name in args}
+    outlines = generate_corpus(args[0], options.get("--documents", 5), options.get("--pages", 20), options.get("--seed", 0))
+    with open(os.path.join(args[0], "expected_outlines.json"), 'w', encoding='utf-8') as f:
+        json.dump(outlines, f, indent=2)
+    print(f"📄 Wrote {len(outlines)} synthetic PDFs and expected_outlines.json to '{args[0]}'")
@@ -1,4 +1,26 @@
+import os
+import sys
 import json
+import importlib.util
+
+ROUND_1A_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Round_1a')
+
+def _load_pipeline_metrics():
+    """
+    Loads the stage metrics module shared with Round 1a from ROUND_1A_DIR by path. It is
+    registered under its module name, so Round 1a code in the same process (fused mode)
+    reports into the same registry.
+    """
+    if 'pipeline_metrics' in sys.modules:
+        return sys.modules['pipeline_metrics']
+    spec = importlib.util.spec_from_file_location('pipeline_metrics', os.path.join(ROUND_1A_DIR, 'pipeline_metrics.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['pipeline_metrics'] = module
+    spec.loader.exec_module(module)
+    return module
+
+metrics = _load_pipeline_metrics()
+peak_rss_mb = metrics.peak_rss_mb
 
 def save_json(data, filepath):
     """
@@ -12,4 +34,4 @@ def save_json(data, filepath):
         with open(filepath, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
     except Exception as e:
-        print(f"🔥 Error saving JSON to {filepath}: {e}")
\ No newline at end of file
+        print(f"🔥 Error saving JSON to {filepath}: {e}")